@@ -18,7 +18,8 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-from istore.app.db.mysql import Base
+from app.models.Base import Base
+import app.models.store_mysql_models  # registers the tables on Base.metadata
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
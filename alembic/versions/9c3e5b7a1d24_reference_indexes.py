@@ -0,0 +1,55 @@
+"""reference indexes
+
+Revision ID: 9c3e5b7a1d24
+Revises: 448da07d9c06
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5b7a1d24'
+down_revision: Union[str, None] = '448da07d9c06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # unique lookups the code already assumes to be unique
+    # (existing duplicate rows have to be cleaned up before upgrading)
+    op.create_index('uq_store_details_mobile', 'store_details', ['mobile'], unique=True)
+    op.create_index('uq_store_details_email', 'store_details', ['email'], unique=True)
+    op.create_index('uq_medicine_master_medicine_name', 'medicine_master', ['medicine_name'], unique=True)
+    op.create_index('uq_distributor_distributor_name', 'distributor', ['distributor_name'], unique=True)
+    op.create_index('uq_manufacturer_manufacturer_name', 'manufacturer', ['manufacturer_name'], unique=True)
+    op.create_index('uq_category_category_name', 'category', ['category_name'], unique=True)
+
+    # active_flag list endpoints, ordered by name
+    op.create_index('ix_store_details_active_flag_store_name', 'store_details', ['active_flag', 'store_name'])
+    op.create_index('ix_medicine_master_active_flag_medicine_name', 'medicine_master', ['active_flag', 'medicine_name'])
+    op.create_index('ix_distributor_active_flag_distributor_name', 'distributor', ['active_flag', 'distributor_name'])
+    op.create_index('ix_manufacturer_active_flag_manufacturer_name', 'manufacturer', ['active_flag', 'manufacturer_name'])
+    op.create_index('ix_category_active_flag_category_name', 'category', ['active_flag', 'category_name'])
+
+    # substitutes of a medicine, covering the substitute name
+    op.create_index('ix_substitutes_medicine_id_substitute_medicine', 'substitutes', ['medicine_id', 'substitute_medicine'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_substitutes_medicine_id_substitute_medicine', table_name='substitutes')
+
+    op.drop_index('ix_category_active_flag_category_name', table_name='category')
+    op.drop_index('ix_manufacturer_active_flag_manufacturer_name', table_name='manufacturer')
+    op.drop_index('ix_distributor_active_flag_distributor_name', table_name='distributor')
+    op.drop_index('ix_medicine_master_active_flag_medicine_name', table_name='medicine_master')
+    op.drop_index('ix_store_details_active_flag_store_name', table_name='store_details')
+
+    op.drop_index('uq_category_category_name', table_name='category')
+    op.drop_index('uq_manufacturer_manufacturer_name', table_name='manufacturer')
+    op.drop_index('uq_distributor_distributor_name', table_name='distributor')
+    op.drop_index('uq_medicine_master_medicine_name', table_name='medicine_master')
+    op.drop_index('uq_store_details_email', table_name='store_details')
+    op.drop_index('uq_store_details_mobile', table_name='store_details')
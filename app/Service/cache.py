@@ -0,0 +1,203 @@
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from collections import OrderedDict
+from app.models.store_mysql_models import MedicineMaster, Category, Manufacturer, Distributor, StoreDetails
+from app.Service.cache_bus import cache_bus
+import threading
+import time
+import os
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DIMENSION_CACHE_TTL_SECONDS = float(os.getenv("DIMENSION_CACHE_TTL_SECONDS", "300"))
+DIMENSION_CACHE_MAX_ENTRIES = int(os.getenv("DIMENSION_CACHE_MAX_ENTRIES", "50000"))
+
+class DimensionCache:
+    """
+    Read-through cache of a small reference table, indexed by id and by name.
+    Rows are kept as plain dicts with a TTL and evicted least recently used past max_entries.
+    Every invalidation bumps the cache version, a load that started on an older version
+    is returned to its caller but never stored, so it cannot bring back a stale row.
+    """
+    def __init__(self, model, id_field: str, name_field: str, ttl_seconds: float = DIMENSION_CACHE_TTL_SECONDS, max_entries: int = DIMENSION_CACHE_MAX_ENTRIES):
+        self.model = model
+        self.id_field = id_field
+        self.name_field = name_field
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._rows = OrderedDict()  # id -> (expires_at, row)
+        self._names = {}  # name -> id
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _row(self, instance):
+        return {column.key: getattr(instance, column.key) for column in self.model.__table__.columns}
+
+    def _drop(self, id):
+        expires_row = self._rows.pop(id, None)
+        if expires_row and self._names.get(expires_row[1][self.name_field]) == id:
+            del self._names[expires_row[1][self.name_field]]
+
+    def _lookup(self, ids):
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            version = self.version
+            for id in ids:
+                expires_row = self._rows.get(id)
+                if expires_row and expires_row[0] > now:
+                    self._rows.move_to_end(id)
+                    found[id] = expires_row[1]
+                    self.hits += 1
+                else:
+                    if expires_row:
+                        self._drop(id)
+                    missing.append(id)
+                    self.misses += 1
+        return found, missing, version
+
+    def _store(self, instances, version: int):
+        rows = {}
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for instance in instances:
+                row = self._row(instance)
+                id = row[self.id_field]
+                rows[id] = row
+                if version != self.version:
+                    continue
+                self._drop(id)
+                self._rows[id] = (expires_at, row)
+                self._names[row[self.name_field]] = id
+            while len(self._rows) > self.max_entries:
+                id, (_, row) = self._rows.popitem(last=False)
+                if self._names.get(row[self.name_field]) == id:
+                    del self._names[row[self.name_field]]
+                self.evictions += 1
+        return rows
+
+    def _by_ids(self, ids):
+        return select(self.model).where(getattr(self.model, self.id_field).in_(ids))
+
+    def _by_name(self, name):
+        return select(self.model).where(getattr(self.model, self.name_field) == name)
+
+    def get_many(self, ids, db: Session):
+        """
+        Rows for a set of ids, missing ids are loaded with one IN query
+        """
+        found, missing, version = self._lookup({id for id in ids if id is not None})
+        if missing:
+            try:
+                found.update(self._store(db.execute(self._by_ids(missing)).scalars().all(), version))
+            except SQLAlchemyError as e:
+                logger.error(f"Database error: {str(e)}")
+                raise HTTPException(status_code=500, detail="Database error: " + str(e))
+        return found
+
+    async def get_many_async(self, ids, db: AsyncSession):
+        """
+        Rows for a set of ids through an async session, missing ids are loaded with one IN query
+        """
+        found, missing, version = self._lookup({id for id in ids if id is not None})
+        if missing:
+            try:
+                result = await db.execute(self._by_ids(missing))
+                found.update(self._store(result.scalars().all(), version))
+            except SQLAlchemyError as e:
+                logger.error(f"Database error: {str(e)}")
+                raise HTTPException(status_code=500, detail="Database error: " + str(e))
+        return found
+
+    def get(self, id, db: Session):
+        return self.get_many([id], db).get(id)
+
+    def get_by_name(self, name: str, db: Session):
+        """
+        Row by its name, loaded on a miss
+        """
+        with self._lock:
+            id = self._names.get(name)
+            version = self.version
+        if id is not None:
+            found, _, version = self._lookup([id])
+            if id in found:
+                return found[id]
+        try:
+            instances = db.execute(self._by_name(name)).scalars().all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Database error: " + str(e))
+        rows = self._store(instances, version)
+        return next(iter(rows.values()), None)
+
+    def invalidate(self, id=None, name: str = None):
+        """
+        Drop one row by id and/or name
+        """
+        with self._lock:
+            self.version += 1
+            if id is None and name is not None:
+                id = self._names.get(name)
+            if id is not None:
+                self._drop(id)
+            if name is not None:
+                self._names.pop(name, None)
+
+    def invalidate_all(self):
+        with self._lock:
+            self.version += 1
+            self._rows.clear()
+            self._names.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._rows),
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+medicine_cache = DimensionCache(MedicineMaster, "medicine_id", "medicine_name")
+category_cache = DimensionCache(Category, "category_id", "category_name")
+manufacturer_cache = DimensionCache(Manufacturer, "manufacturer_id", "manufacturer_name")
+distributor_cache = DimensionCache(Distributor, "distributor_id", "distributor_name")
+# store profiles by store_id and by mobile, the admin /stores/{mobile} paths and the user login read it
+store_cache = DimensionCache(StoreDetails, "store_id", "mobile")
+
+dimension_caches = {
+    "medicine": medicine_cache,
+    "category": category_cache,
+    "manufacturer": manufacturer_cache,
+    "distributor": distributor_cache,
+    "store": store_cache
+}
+
+def apply_invalidation(message: dict):
+    """
+    Invalidation bus subscriber for the dimension caches, a message without a key drops the whole entity.
+    The name comes as name or under the name column of the cache (mobile for stores).
+    """
+    cache = dimension_caches.get(message.get("entity"))
+    if cache is None:
+        return
+    name = message.get("name", message.get(cache.name_field))
+    if message.get("key") is None and name is None:
+        cache.invalidate_all()
+    else:
+        cache.invalidate(message.get("key"), name=name)
+
+cache_bus.subscribe(apply_invalidation)
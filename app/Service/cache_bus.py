@@ -0,0 +1,168 @@
+from pymongo import CursorType, ReturnDocument
+from pymongo.errors import CollectionInvalid, PyMongoError
+from collections import deque
+from datetime import datetime
+from uuid import uuid4
+import asyncio
+import os
+import queue
+import socket
+import threading
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+CACHE_BUS_BACKEND = os.getenv("CACHE_BUS_BACKEND", "mongo")
+CACHE_BUS_COLLECTION = os.getenv("CACHE_BUS_COLLECTION", "cache_invalidations")
+CACHE_BUS_SIZE_BYTES = int(os.getenv("CACHE_BUS_SIZE_BYTES", str(16 * 1024 * 1024)))
+# holds the last assigned message sequence, a capped collection cannot be updated in place
+CACHE_BUS_SEQUENCE_COLLECTION = os.getenv("CACHE_BUS_SEQUENCE_COLLECTION", "cache_invalidation_sequence")
+# sequences re-read after a reconnect, covers messages whose insert lost the race with a later sequence
+CACHE_BUS_RESUME_OVERLAP = int(os.getenv("CACHE_BUS_RESUME_OVERLAP", "256"))
+
+# identifies this worker, so it skips its own messages when tailing the shared channel
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+class LoopbackBus:
+    """
+    In-memory invalidation channel, messages are only delivered to the subscribers of this process.
+    Used for tests and single worker deployments.
+    """
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def publish(self, entity: str, key=None, **extra):
+        """
+        Publish that an entity row changed, key is its id (None for the whole entity)
+        """
+        message = {
+            "entity": entity,
+            "key": key,
+            "worker": WORKER_ID,
+            "published_at": datetime.utcnow(),
+            **extra
+        }
+        self._deliver(message)
+        return message
+
+    def _deliver(self, message: dict):
+        for callback in self._subscribers:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"Error applying cache invalidation {message.get('entity')}:{message.get('key')}: {str(e)}")
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+class MongoCappedBus(LoopbackBus):
+    """
+    Invalidation channel shared by every worker through a Mongo capped collection.
+    Messages are applied locally right away, written by a background thread with a
+    sequence from a shared counter and picked up by the other workers with a tailable
+    await cursor, which resumes by that sequence after a reconnect.
+    """
+    def __init__(self, database, collection_name: str = CACHE_BUS_COLLECTION, size_bytes: int = CACHE_BUS_SIZE_BYTES):
+        super().__init__()
+        self._database = database
+        self._collection_name = collection_name
+        self._size_bytes = size_bytes
+        self._outbox = queue.SimpleQueue()
+        self._sender = None
+        self._sender_lock = threading.Lock()
+        self._tail_task = None
+
+    def publish(self, entity: str, key=None, **extra):
+        message = super().publish(entity, key, **extra)
+        self._ensure_sender()
+        self._outbox.put(dict(message))
+        return message
+
+    def _ensure_sender(self):
+        with self._sender_lock:
+            if self._sender is None or not self._sender.is_alive():
+                self._sender = threading.Thread(target=self._send_loop, name="cache-bus-sender", daemon=True)
+                self._sender.start()
+
+    def _send_loop(self):
+        # the sync pymongo database behind Motor, so sync and async callers never wait on the write
+        collection = self._database.delegate[self._collection_name]
+        sequence = self._database.delegate[CACHE_BUS_SEQUENCE_COLLECTION]
+        while True:
+            message = self._outbox.get()
+            try:
+                # client generated _ids are not ordered across processes, the server assigned sequence is
+                message["seq"] = sequence.find_one_and_update(
+                    {"_id": self._collection_name}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+                )["seq"]
+                collection.insert_one(message)
+            except PyMongoError as e:
+                logger.error(f"Error publishing cache invalidation {message.get('entity')}:{message.get('key')}: {str(e)}")
+
+    async def start(self):
+        try:
+            await self._database.create_collection(self._collection_name, capped=True, size=self._size_bytes)
+        except CollectionInvalid:
+            pass
+        self._tail_task = asyncio.create_task(self._tail())
+
+    async def stop(self):
+        if self._tail_task:
+            self._tail_task.cancel()
+            self._tail_task = None
+
+    async def _tail(self):
+        collection = self._database[self._collection_name]
+        # only messages published after this worker started
+        last = await collection.find_one({}, sort=[("$natural", -1)])
+        last_seq = last.get("seq", 0) if last else 0
+        query = {"seq": {"$gt": last_seq}}
+        # sequences already applied, the overlap re-read after a reconnect skips them
+        delivered = deque(maxlen=CACHE_BUS_RESUME_OVERLAP * 2)
+        while True:
+            try:
+                cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT).sort("$natural", 1)
+                while cursor.alive:
+                    async for message in cursor:
+                        seq = message.get("seq")
+                        if seq is None or seq in delivered:
+                            continue
+                        delivered.append(seq)
+                        last_seq = max(last_seq, seq)
+                        if message.get("worker") != WORKER_ID:
+                            self._deliver(message)
+                # a message can be inserted after one with a higher sequence, resume a little before the highest seen
+                query = {"seq": {"$gt": last_seq - CACHE_BUS_RESUME_OVERLAP}}
+                # an empty capped collection gives a dead cursor straight away
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error tailing the cache invalidation channel: {str(e)}")
+                query = {"seq": {"$gt": last_seq - CACHE_BUS_RESUME_OVERLAP}}
+                await asyncio.sleep(5)
+
+def _create_bus():
+    if CACHE_BUS_BACKEND == "loopback":
+        return LoopbackBus()
+    from app.db.mongodb import database
+    if database is None:
+        logger.error("MongoDB is not available, cache invalidations stay local to this worker")
+        return LoopbackBus()
+    return MongoCappedBus(database)
+
+cache_bus = _create_bus()
+
+def publish_invalidation(entity: str, key=None, **extra):
+    """
+    Publish that a row of an entity changed, to this worker and to every other one
+    """
+    return cache_bus.publish(entity, key, **extra)
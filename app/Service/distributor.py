@@ -1,10 +1,12 @@
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.store_mysql_models import Distributor as DistributorModel
 from app.schemas.DistributorSchema import DistributorCreate
 import logging
 from app.db.mysql_session import get_db
+from app.Service.cache import distributor_cache
 
 # configuring the logger
 logger = logging.getLogger(__name__)
@@ -22,4 +24,11 @@ def check_distributor_available(name:str, db:Session):
             return "unique"
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database error: " + str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
+async def get_distributor_names(distributor_ids, db: AsyncSession):
+    """
+    Distributor names for a set of distributor ids, read through the distributor cache
+    """
+    distributors = await distributor_cache.get_many_async(distributor_ids, db)
+    return {distributor_id: distributor["distributor_name"] for distributor_id, distributor in distributors.items()}
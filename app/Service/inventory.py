@@ -0,0 +1,147 @@
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import sys
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# per store projection of the stock batches, one document per (store_id, medicine_id)
+INVENTORY_COLLECTION = "store_inventory"
+# (store_id, medicine_id) keys per $or query
+INVENTORY_KEY_CHUNK = 500
+
+def inventory_pipeline(match: dict, refreshed_at: datetime):
+    """
+    Aggregation recomputing the inventory of the matched stock batches and merging it into store_inventory.
+    Only batches with stock left count towards the batch count and the earliest expiry.
+    """
+    has_stock = {"$gt": ["$available_stock", 0]}
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"store_id": "$store_id", "medicine_id": "$medicine_id"},
+            "total_units": {"$sum": {"$max": ["$available_stock", 0]}},
+            "batch_count": {"$sum": {"$cond": [has_stock, 1, 0]}},
+            "earliest_expiry": {"$min": {"$cond": [has_stock, "$batch_detais.expiry_date", None]}}
+        }},
+        {"$lookup": {
+            "from": "pricing",
+            "localField": "_id.medicine_id",
+            "foreignField": "medicine_id",
+            "let": {"store_id": "$_id.store_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$store_id", "$$store_id"]}}},
+                {"$sort": {"updated_on": -1}},
+                {"$limit": 1},
+                {"$project": {"_id": 0, "net_rate": 1}}
+            ],
+            "as": "pricing"
+        }},
+        {"$project": {
+            "_id": 0,
+            "store_id": "$_id.store_id",
+            "medicine_id": "$_id.medicine_id",
+            "total_units": 1,
+            "batch_count": 1,
+            "earliest_expiry": 1,
+            "in_stock": {"$gt": ["$total_units", 0]},
+            "net_rate": {"$first": "$pricing.net_rate"},
+            "refreshed_at": {"$literal": refreshed_at}
+        }},
+        {"$merge": {"into": INVENTORY_COLLECTION, "on": ["store_id", "medicine_id"], "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+async def refresh_inventory(keys, mongo_db):
+    """
+    Recompute the inventory of the given (store_id, medicine_id) keys after their stock or price changed.
+    Failures are logged and not raised, the write that triggered the refresh already happened
+    and a rebuild puts the projection back in line.
+    """
+    keys = {(store_id, medicine_id) for store_id, medicine_id in keys if store_id is not None and medicine_id is not None}
+    if not keys:
+        return
+    key_filter = {"$or": [{"store_id": store_id, "medicine_id": medicine_id} for store_id, medicine_id in keys]}
+    refreshed_at = datetime.utcnow()
+    try:
+        await mongo_db.stocks.aggregate(inventory_pipeline(key_filter, refreshed_at)).to_list(length=None)
+        # keys without any batch left are not produced by the $group, only those are zeroed
+        missing = keys - await _keys_with_batches(keys, mongo_db)
+        if missing:
+            await mongo_db[INVENTORY_COLLECTION].update_many(
+                {"$or": [{"store_id": store_id, "medicine_id": medicine_id} for store_id, medicine_id in missing]},
+                {"$set": {"total_units": 0, "batch_count": 0, "earliest_expiry": None, "in_stock": False, "refreshed_at": refreshed_at}}
+            )
+    except Exception as e:
+        logger.error(f"Error refreshing store inventory for {len(keys)} keys: {str(e)}")
+
+async def _keys_with_batches(keys, mongo_db):
+    """
+    The (store_id, medicine_id) keys that have at least one stock batch
+    """
+    keys = list(keys)
+    produced = set()
+    for start in range(0, len(keys), INVENTORY_KEY_CHUNK):
+        groups = await mongo_db.stocks.aggregate([
+            {"$match": {"$or": [{"store_id": store_id, "medicine_id": medicine_id} for store_id, medicine_id in keys[start:start + INVENTORY_KEY_CHUNK]]}},
+            {"$group": {"_id": {"store_id": "$store_id", "medicine_id": "$medicine_id"}}}
+        ]).to_list(length=None)
+        produced.update((group["_id"]["store_id"], group["_id"]["medicine_id"]) for group in groups)
+    return produced
+
+async def _orphan_ids(candidates, mongo_db):
+    """
+    _ids of the inventory documents whose (store_id, medicine_id) has no stock batch at all
+    """
+    produced = await _keys_with_batches({(document["store_id"], document["medicine_id"]) for document in candidates}, mongo_db)
+    return [document["_id"] for document in candidates if (document["store_id"], document["medicine_id"]) not in produced]
+
+async def rebuild_inventory(mongo_db):
+    """
+    Recompute the whole projection from stocks in one aggregation and drop the keys that have no batch left.
+    A document the rebuild did not write is only dropped when stocks has no batch for its key,
+    so a refresh that ran alongside the rebuild is kept.
+    """
+    refreshed_at = datetime.utcnow()
+    await mongo_db.stocks.aggregate(inventory_pipeline({}, refreshed_at)).to_list(length=None)
+    candidates = await mongo_db[INVENTORY_COLLECTION].find(
+        {"refreshed_at": {"$ne": refreshed_at}}, {"_id": 1, "store_id": 1, "medicine_id": 1}
+    ).to_list(length=None)
+    orphan_ids = await _orphan_ids(candidates, mongo_db)
+    removed = 0
+    if orphan_ids:
+        removed = (await mongo_db[INVENTORY_COLLECTION].delete_many({"_id": {"$in": orphan_ids}})).deleted_count
+    count = await mongo_db[INVENTORY_COLLECTION].count_documents({})
+    logger.info(f"Store inventory rebuilt: {count} keys, {removed} removed")
+    return {"keys": count, "removed": removed}
+
+async def get_inventory(keys, mongo_db, fields=("total_units",)):
+    """
+    Inventory of the given (store_id, medicine_id) keys keyed the same way, read on the unique key index.
+    Keys without a document are left out.
+    """
+    keys = list({(store_id, medicine_id) for store_id, medicine_id in keys})
+    inventory = {}
+    for start in range(0, len(keys), INVENTORY_KEY_CHUNK):
+        documents = await mongo_db[INVENTORY_COLLECTION].find(
+            {"$or": [{"store_id": store_id, "medicine_id": medicine_id} for store_id, medicine_id in keys[start:start + INVENTORY_KEY_CHUNK]]},
+            {"_id": 0, "store_id": 1, "medicine_id": 1, **{field: 1 for field in fields}}
+        ).to_list(length=None)
+        for document in documents:
+            inventory[(document["store_id"], document["medicine_id"])] = document
+    return inventory
+
+async def _main(command: str):
+    from app.db.mongodb import get_database
+    result = await rebuild_inventory(get_database())
+    print(json.dumps(result, indent=2, default=str))
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store inventory projection: rebuild it from the stocks collection")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.command)))
@@ -1,10 +1,12 @@
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.store_mysql_models import MedicineMaster as MedicineMasterModel
 from app.schemas.MedicinemasterSchema import MedicineMasterCreate
 import logging
 from app.db.mysql_session import get_db
+from app.Service.cache import medicine_cache, category_cache, manufacturer_cache
 
 # configuring the logger
 logger = logging.getLogger(__name__)
@@ -22,4 +24,23 @@ def check_medicine_available(name:str, db:Session):
             return "unique"
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database error: " + str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
+async def get_medicine_details(medicine_ids, db: AsyncSession):
+    """
+    Medicine, category and manufacturer names for a set of medicine ids, read through the dimension caches
+    """
+    medicines = await medicine_cache.get_many_async(medicine_ids, db)
+    categories = await category_cache.get_many_async([medicine["category_id"] for medicine in medicines.values()], db)
+    manufacturers = await manufacturer_cache.get_many_async([medicine["manufacturer_id"] for medicine in medicines.values()], db)
+    return {
+        medicine_id: {
+            "medicine_id": medicine_id,
+            "medicine_name": medicine["medicine_name"],
+            "generic_name": medicine["generic_name"],
+            "manufacturer_id": medicine["manufacturer_id"],
+            "category_name": categories.get(medicine["category_id"], {}).get("category_name"),
+            "manufacturer_name": manufacturers.get(medicine["manufacturer_id"], {}).get("manufacturer_name")
+        }
+        for medicine_id, medicine in medicines.items()
+    }
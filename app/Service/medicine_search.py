@@ -0,0 +1,261 @@
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from app.models.store_mysql_models import MedicineMaster
+from app.db.mysql import SessionLocal
+from app.Service.cache_bus import cache_bus
+from bisect import bisect_left
+from collections import Counter
+import heapq
+import math
+import threading
+import re
+import os
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# most prefix matches scored per query
+MEDICINE_SEARCH_MAX_CANDIDATES = int(os.getenv("MEDICINE_SEARCH_MAX_CANDIDATES", "2000"))
+# most misspelling candidates scored per query, the ones sharing most trigrams with it
+MEDICINE_SEARCH_FUZZY_CANDIDATES = int(os.getenv("MEDICINE_SEARCH_FUZZY_CANDIDATES", "200"))
+# trigram similarity below this is not a match
+MEDICINE_SEARCH_MIN_SIMILARITY = float(os.getenv("MEDICINE_SEARCH_MIN_SIMILARITY", "0.3"))
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+def normalize(text):
+    return _NON_ALPHANUMERIC.sub(" ", (text or "").lower()).strip()
+
+def trigrams(text: str):
+    """
+    Trigrams of every word, padded like pg_trgm so short words and word starts count
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class MedicineSearchIndex:
+    """
+    In-memory search over medicine_name, generic_name and hsn_code of the active medicines.
+    A sorted word list answers prefixes, a trigram inverted index answers misspellings.
+    Writes only mark a medicine dirty (locally or through the cache bus), the next search reloads it.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self._dirty = set()
+        self._stale = True
+
+    def _clear(self):
+        self._rows = {}  # medicine_id -> row
+        self._grams = {}  # medicine_id -> (name trigrams, generic trigrams)
+        self._postings = {}  # trigram -> set of medicine_ids
+        self._words = []  # sorted distinct words of the names and generic names
+        self._word_ids = {}  # word -> set of medicine_ids
+        self._hsn_ids = {}  # hsn_code -> set of medicine_ids
+
+    def _add(self, row, insert_words: bool = True):
+        id = row["medicine_id"]
+        name, generic = normalize(row["medicine_name"]), normalize(row["generic_name"])
+        row = {**row, "_name": name, "_generic": generic}
+        name_grams, generic_grams = trigrams(name), trigrams(generic)
+        self._rows[id] = row
+        self._grams[id] = (name_grams, generic_grams)
+        for gram in name_grams | generic_grams:
+            self._postings.setdefault(gram, set()).add(id)
+        for word in set(name.split()) | set(generic.split()):
+            ids = self._word_ids.get(word)
+            if ids is None:
+                ids = self._word_ids[word] = set()
+                if insert_words:
+                    self._words.insert(bisect_left(self._words, word), word)
+            ids.add(id)
+        if row["hsn_code"]:
+            self._hsn_ids.setdefault(row["hsn_code"], set()).add(id)
+
+    def _remove(self, id):
+        row = self._rows.pop(id, None)
+        if row is None:
+            return
+        name_grams, generic_grams = self._grams.pop(id)
+        for gram in name_grams | generic_grams:
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self._postings[gram]
+        for word in set(row["_name"].split()) | set(row["_generic"].split()):
+            ids = self._word_ids.get(word)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self._word_ids[word]
+                    del self._words[bisect_left(self._words, word)]
+        if row["hsn_code"]:
+            self._hsn_ids.get(row["hsn_code"], set()).discard(id)
+
+    @staticmethod
+    def _row(instance):
+        return {
+            "medicine_id": instance.medicine_id,
+            "medicine_name": instance.medicine_name,
+            "generic_name": instance.generic_name,
+            "hsn_code": instance.hsn_code,
+            "manufacturer_id": instance.manufacturer_id,
+            "category_id": instance.category_id
+        }
+
+    def load(self, db: Session):
+        """
+        Build the index from every active medicine
+        """
+        instances = db.execute(select(MedicineMaster).where(MedicineMaster.active_flag == 1)).scalars().all()
+        # built aside and swapped in, searches keep using the old index meanwhile
+        built = MedicineSearchIndex()
+        # one insert per new word is quadratic on a full catalogue, the word list is sorted once instead
+        for instance in instances:
+            built._add(self._row(instance), insert_words=False)
+        built._words = sorted(built._word_ids)
+        with self._lock:
+            self._rows, self._grams, self._postings = built._rows, built._grams, built._postings
+            self._words, self._word_ids, self._hsn_ids = built._words, built._word_ids, built._hsn_ids
+            self._stale = False
+        logger.info(f"Medicine search index built: {len(self._rows)} medicines, {len(self._postings)} trigrams")
+
+    def mark_dirty(self, id=None):
+        with self._lock:
+            if id is None:
+                self._stale = True
+            else:
+                self._dirty.add(id)
+
+    def _refresh(self, db: Session):
+        with self._lock:
+            stale, dirty = self._stale, set(self._dirty)
+            self._dirty.clear()
+        if stale:
+            self.load(db)
+            return
+        if not dirty:
+            return
+        try:
+            instances = db.execute(select(MedicineMaster).where(MedicineMaster.medicine_id.in_(dirty))).scalars().all()
+        except Exception:
+            # put the invalidations back, the next search retries them
+            with self._lock:
+                self._dirty |= dirty
+            raise
+        with self._lock:
+            for id in dirty:
+                self._remove(id)
+            for instance in instances:
+                if instance.active_flag == 1:
+                    self._add(self._row(instance))
+
+    def _prefix_ids(self, prefix: str, limit: int):
+        # words are walked in order, so the word equal to the prefix and the closest ones come first
+        ids = set()
+        position = bisect_left(self._words, prefix)
+        while position < len(self._words) and self._words[position].startswith(prefix) and len(ids) < limit:
+            ids |= self._word_ids[self._words[position]]
+            position += 1
+        return ids
+
+    def _trigram_ids(self, query_grams, limit: int):
+        """
+        Ids that can reach MEDICINE_SEARCH_MIN_SIMILARITY, the ones sharing most trigrams first.
+        Reaching it needs ceil(similarity * len(query_grams)) shared trigrams, so every match
+        has at least one of the len(query_grams) - needed + 1 rarest ones and the common ones are never read.
+        """
+        needed = max(math.ceil(MEDICINE_SEARCH_MIN_SIMILARITY * len(query_grams)), 1)
+        rarest = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))[:len(query_grams) - needed + 1]
+        hits = Counter()
+        for gram in rarest:
+            hits.update(self._postings.get(gram, ()))
+        return [id for id, _ in hits.most_common(limit)]
+
+    def _score(self, id, query: str, words, query_grams):
+        row = self._rows[id]
+        name, generic = row["_name"], row["_generic"]
+        if name == query:
+            return 100.0
+        if name.startswith(query):
+            return 90.0
+        if generic == query:
+            return 85.0
+        if generic.startswith(query):
+            return 75.0
+        # every typed word starts some word of the name, "amox 500"
+        name_words = name.split()
+        if all(any(word.startswith(typed) for word in name_words) for typed in words):
+            return 70.0
+        name_grams, generic_grams = self._grams[id]
+        similarity = max(
+            len(query_grams & name_grams) / len(query_grams | name_grams) if name_grams else 0.0,
+            0.9 * len(query_grams & generic_grams) / len(query_grams | generic_grams) if generic_grams else 0.0
+        )
+        return similarity * 60.0 if similarity >= MEDICINE_SEARCH_MIN_SIMILARITY else 0.0
+
+    def search(self, q: str, db: Session, limit: int = 20):
+        """
+        Ranked medicines for a partial or misspelled name, generic name or HSN code
+        """
+        self._refresh(db)
+        query = normalize(q)
+        if not query:
+            return []
+        words = query.split()
+        query_grams = trigrams(query)
+        hsn_code = q.strip()
+        with self._lock:
+            scores = {id: 95.0 for id in self._hsn_ids.get(hsn_code, ())}
+            # the longest typed word narrows the prefix matches the most, _score checks the others
+            for id in self._prefix_ids(max(words, key=len), MEDICINE_SEARCH_MAX_CANDIDATES):
+                if id not in scores:
+                    scores[id] = self._score(id, query, words, query_grams)
+            # fuzzy matches score below 70, only look for them when the prefix matches do not fill the page
+            if sum(score >= 70.0 for score in scores.values()) < limit:
+                # strengths and pack sizes are shared by thousands of medicines, the letters carry the typo
+                letter_grams = trigrams(" ".join(word for word in words if not word.isdigit())) or query_grams
+                for id in self._trigram_ids(letter_grams, MEDICINE_SEARCH_FUZZY_CANDIDATES):
+                    if id not in scores:
+                        scores[id] = self._score(id, query, words, query_grams)
+            best = heapq.nsmallest(limit, ((-score, self._rows[id]["_name"], id) for id, score in scores.items() if score > 0))
+            return [
+                {key: value for key, value in self._rows[id].items() if not key.startswith("_")} | {"score": round(-score, 2)}
+                for score, _, id in best
+            ]
+
+medicine_search_index = MedicineSearchIndex()
+
+def apply_medicine_invalidation(message: dict):
+    """
+    Cache bus subscriber, a changed medicine is reloaded on the next search of this worker
+    """
+    if message.get("entity") == "medicine":
+        medicine_search_index.mark_dirty(message.get("key"))
+
+cache_bus.subscribe(apply_medicine_invalidation)
+
+def build_medicine_search_index():
+    """
+    Startup build in its own session, run in a thread so the event loop keeps serving
+    """
+    db = SessionLocal()
+    try:
+        medicine_search_index.load(db)
+    finally:
+        db.close()
+
+def search_medicines(q: str, db: Session, limit: int = 20):
+    try:
+        return medicine_search_index.search(q, db, limit)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -0,0 +1,198 @@
+from fastapi import HTTPException, Query
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.orm import Session, load_only
+from bson import json_util
+from app.Service.cache_bus import cache_bus
+from typing import Optional
+import threading
+import base64
+import time
+import os
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "1000"))
+PAGE_COUNT_TTL_SECONDS = float(os.getenv("PAGE_COUNT_TTL_SECONDS", "60"))
+
+def encode_cursor(values: dict):
+    """
+    Encode the keyset position of the last returned row as an opaque cursor
+    """
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str):
+    """
+    Decode an opaque cursor back to the keyset position
+    """
+    try:
+        return json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except Exception as e:
+        logger.error(f"Invalid cursor: {str(e)}")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+class PageParams:
+    """
+    Query parameters of the list endpoints, used as a dependency
+    """
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+        limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+        fields: Optional[str] = Query(None, description="comma separated fields to return, all of them by default"),
+        sort: Optional[str] = Query(None, description="field to order by, the primary key by default"),
+        include_total: bool = Query(False, description="add the total row count, cached for a short while")
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.fields = fields
+        self.sort = sort
+        self.include_total = include_total
+
+def select_fields(fields: Optional[str], allowed):
+    allowed = list(allowed)
+    if not fields:
+        return allowed
+    selected = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in allowed]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {', '.join(unknown)}, allowed: {', '.join(allowed)}")
+    return selected
+
+def _sort_key(params: PageParams, primary_key: str, sorts):
+    key = params.sort or primary_key
+    if key != primary_key and key not in sorts:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {key}, allowed: {', '.join([primary_key, *sorts])}")
+    return key
+
+def _position(params: PageParams, key: str, primary_key: str):
+    position = decode_cursor(params.cursor)
+    if not isinstance(position, dict) or primary_key not in position or key not in position:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+def _page(items, next_cursor, total):
+    page = {"items": items, "next_cursor": next_cursor}
+    if total is not None:
+        page["total"] = total
+    return page
+
+class CountCache:
+    """
+    Totals of the list endpoints per entity and filter, kept for a TTL.
+    A write to the entity (through the cache bus) drops its totals and bumps its version,
+    a count that started on an older version is returned but never stored.
+    """
+    def __init__(self, ttl_seconds: float = PAGE_COUNT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counts = {}  # (entity, filter key) -> (expires_at, count)
+        self._versions = {}  # entity -> version
+
+    def get(self, entity: str, key: str):
+        with self._lock:
+            expires_count = self._counts.get((entity, key))
+            version = self._versions.get(entity, 0)
+        if expires_count and expires_count[0] > time.monotonic():
+            return expires_count[1], version
+        return None, version
+
+    def put(self, entity: str, key: str, count: int, version: int):
+        with self._lock:
+            if self._versions.get(entity, 0) == version:
+                self._counts[(entity, key)] = (time.monotonic() + self.ttl_seconds, count)
+
+    def invalidate(self, entity: str):
+        with self._lock:
+            self._versions[entity] = self._versions.get(entity, 0) + 1
+            for cached in [cached for cached in self._counts if cached[0] == entity]:
+                del self._counts[cached]
+
+count_cache = CountCache()
+
+def apply_count_invalidation(message: dict):
+    """
+    Cache bus subscriber, any write to an entity drops its cached totals
+    """
+    if message.get("entity"):
+        count_cache.invalidate(message["entity"])
+
+cache_bus.subscribe(apply_count_invalidation)
+
+def sql_page(db: Session, model, params: PageParams, entity: str, sorts=(), fields=None, filters: dict = None):
+    """
+    Keyset page of a table ordered by (sort key, primary key), only the requested columns are loaded.
+    NULL sort keys come first as in MySQL, the cursor of a NULL key continues among the NULLs.
+    """
+    primary_key = model.__mapper__.primary_key[0].key
+    key = _sort_key(params, primary_key, sorts)
+    selected = select_fields(params.fields, fields or model.__table__.columns.keys())
+    key_column, primary_column = getattr(model, key), getattr(model, primary_key)
+    where = [getattr(model, field) == value for field, value in (filters or {}).items()]
+
+    query = select(model).options(load_only(*(getattr(model, field) for field in dict.fromkeys([*selected, key, primary_key])))).where(*where)
+    if params.cursor:
+        position = _position(params, key, primary_key)
+        if key == primary_key:
+            query = query.where(primary_column > position[primary_key])
+        elif position[key] is None:
+            query = query.where(or_(key_column.isnot(None), and_(key_column.is_(None), primary_column > position[primary_key])))
+        else:
+            query = query.where(or_(key_column > position[key], and_(key_column == position[key], primary_column > position[primary_key])))
+    order = [primary_column] if key == primary_key else [key_column, primary_column]
+    instances = db.execute(query.order_by(*order).limit(params.limit + 1)).scalars().all()
+
+    next_cursor = None
+    if len(instances) > params.limit:
+        instances = instances[:params.limit]
+        last = instances[-1]
+        next_cursor = encode_cursor({key: getattr(last, key), primary_key: getattr(last, primary_key)})
+
+    total = None
+    if params.include_total:
+        count_key = json_util.dumps(sorted((filters or {}).items()))
+        total, version = count_cache.get(entity, count_key)
+        if total is None:
+            total = db.execute(select(func.count()).select_from(model).where(*where)).scalar_one()
+            count_cache.put(entity, count_key, total, version)
+    return _page([{field: getattr(instance, field) for field in selected} for instance in instances], next_cursor, total)
+
+async def mongo_page(collection, params: PageParams, entity: str, fields, sorts=(), filters: dict = None):
+    """
+    Keyset page of a collection ordered by (sort key, _id) with a projection of the requested fields.
+    _id is read for the cursor only, the items carry just the model fields as before.
+    """
+    key = _sort_key(params, "_id", sorts)
+    selected = select_fields(params.fields, fields)
+    projection = {field: 1 for field in dict.fromkeys([*selected, key, "_id"])}
+    match = dict(filters or {})
+
+    if params.cursor:
+        position = _position(params, key, "_id")
+        if key == "_id":
+            after = {"_id": {"$gt": position["_id"]}}
+        elif position[key] is None:
+            after = {"$or": [{key: {"$ne": None}}, {key: None, "_id": {"$gt": position["_id"]}}]}
+        else:
+            after = {"$or": [{key: {"$gt": position[key]}}, {key: position[key], "_id": {"$gt": position["_id"]}}]}
+        match = {"$and": [match, after]} if match else after
+    order = [("_id", 1)] if key == "_id" else [(key, 1), ("_id", 1)]
+    documents = await collection.find(match, projection).sort(order).limit(params.limit + 1).to_list(length=None)
+
+    next_cursor = None
+    if len(documents) > params.limit:
+        documents = documents[:params.limit]
+        next_cursor = encode_cursor({key: documents[-1].get(key), "_id": documents[-1]["_id"]})
+
+    total = None
+    if params.include_total:
+        count_key = json_util.dumps(filters or {}, sort_keys=True)
+        total, version = count_cache.get(entity, count_key)
+        if total is None:
+            # without a filter the collection metadata answers, no scan
+            total = await collection.count_documents(filters) if filters else await collection.estimated_document_count()
+            count_cache.put(entity, count_key, total, version)
+    return _page([{field: document.get(field) for field in selected} for document in documents], next_cursor, total)
@@ -0,0 +1,323 @@
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pydantic import ValidationError
+from app.models.store_mongodb_models import Purchase, PurchaseItem
+from app.Service.cache_bus import publish_invalidation
+from app.Service.inventory import refresh_inventory
+from datetime import datetime
+from typing import List
+import csv
+import io
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+PURCHASE_HEADER_FIELDS = ["store_id", "purchase_date", "distributor_id", "invoice_number", "total_amount"]
+
+def _validation_errors(error: ValidationError):
+    return [f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()]
+
+def purchase_rows_from_json(invoices: List[dict]):
+    """
+    One ingestion row per purchase item of every invoice, numbered from 1 across the request
+    """
+    rows = []
+    for invoice in invoices:
+        header = {field: invoice.get(field) for field in PURCHASE_HEADER_FIELDS}
+        for item in invoice.get("purchase_items") or []:
+            rows.append({"row": len(rows) + 1, "header": header, "item": item})
+    return rows
+
+def purchase_rows_from_csv(content: bytes):
+    """
+    One ingestion row per CSV line, the invoice columns are repeated on every line of the invoice.
+    Rows are numbered by their CSV line, total_amount is optional and summed from the items when missing.
+    """
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    rows = []
+    for line_number, line in enumerate(reader, start=2):
+        values = {key.strip(): (value.strip() if value and value.strip() else None) for key, value in line.items() if key}
+        header = {field: values.pop(field, None) for field in PURCHASE_HEADER_FIELDS}
+        rows.append({"row": line_number, "header": header, "item": values})
+    return rows
+
+def _invoice_key(header: dict):
+    # raw values, so CSV strings and JSON numbers of the same invoice group together
+    return tuple(str(header.get(field)) for field in ("store_id", "distributor_id", "invoice_number"))
+
+def _validate_rows(rows):
+    """
+    Validate every row and group the rows into invoices keyed by (store_id, distributor_id, invoice_number).
+    An invoice is loaded whole or not at all, only invoices without an invalid row are returned.
+    """
+    today = datetime.now().strftime('%Y-%m-%d')
+    invoices = {}
+    for row in rows:
+        row["errors"] = []
+        invoices.setdefault(_invoice_key(row["header"]), []).append(row)
+        try:
+            header = Purchase(**{**row["header"], "total_amount": row["header"].get("total_amount") or 0, "purchase_items": []})
+            row["header"] = header.dict(exclude={"purchase_items"})
+        except ValidationError as e:
+            row["errors"].extend(_validation_errors(e))
+        try:
+            item = PurchaseItem(**row["item"]).dict()
+            row["item"] = item
+            if item["expiry_date"] < today:
+                row["errors"].append("expiry_date: must be after today's date")
+            else:
+                item["expiry"] = datetime.strptime(item["expiry_date"], '%Y-%m-%d')
+                item["batch_number"] = item["batch_number"] or item["batch_id"]
+        except ValidationError as e:
+            row["errors"].extend(_validation_errors(e))
+        except ValueError as e:
+            row["errors"].append(f"expiry_date: {str(e)}")
+
+    for key in list(invoices):
+        if any(row["errors"] for row in invoices[key]):
+            for row in invoices.pop(key):
+                if not row["errors"]:
+                    row["errors"].append("invoice has invalid rows, not loaded")
+    return invoices
+
+def _purchase_documents(invoices):
+    documents = []
+    for rows in invoices.values():
+        header = rows[0]["header"]
+        items = [{key: value for key, value in row["item"].items() if key != "expiry"} for row in rows]
+        total_amount = header["total_amount"] or sum(item["price"] * item["quantity"] for item in items)
+        documents.append({
+            "store_id": header["store_id"],
+            "purchase_date": header["purchase_date"],
+            "distributor_id": header["distributor_id"],
+            "total_amount": total_amount,
+            "invoice_number": header["invoice_number"],
+            "purchase_items": items
+        })
+    return documents
+
+def _stock_operations(invoices):
+    """
+    One upsert per (store_id, medicine_id, batch_number),
+    rows of the same batch are summed so the request never races itself on an upsert.
+    Each batch keeps the quantity every invoice added, to take an invoice back out.
+    """
+    batches = {}
+    for invoice_key, rows in invoices.items():
+        store_id = rows[0]["header"]["store_id"]
+        for row in rows:
+            item = row["item"]
+            batch_key = (store_id, item["medicine_id"], item["batch_number"])
+            batch = batches.setdefault(batch_key, {"item": item, "quantity": 0, "rows": [], "invoices": {}})
+            batch["quantity"] += item["medicine_quantity"]
+            batch["rows"].append(row)
+            batch["invoices"][invoice_key] = batch["invoices"].get(invoice_key, 0) + item["medicine_quantity"]
+
+    stock_operations = []
+    stock_batches = []
+    for (store_id, medicine_id, batch_number), batch in batches.items():
+        item = batch["item"]
+        stock_operations.append(UpdateOne(
+            {"store_id": store_id, "medicine_id": medicine_id, "batch_detais.batch_number": batch_number},
+            {
+                "$inc": {"available_stock": batch["quantity"], "batch_detais.batch_quantity": batch["quantity"]},
+                "$setOnInsert": {
+                    "medicine_form": item["medicine_form"],
+                    "batch_detais.expiry_date": item["expiry"],
+                    "batch_detais.units_in_pack": item["units_in_pack"]
+                }
+            },
+            upsert=True
+        ))
+        stock_batches.append({
+            "key": (store_id, medicine_id, batch_number),
+            "store_id": store_id,
+            "medicine_id": medicine_id,
+            "rows": batch["rows"],
+            "invoices": batch["invoices"]
+        })
+    return stock_operations, stock_batches
+
+def _availability_operations(invoices, updated_by: str):
+    """
+    One availability $inc per (store_id, medicine_id), summed over the loaded invoices
+    """
+    availability = {}
+    for rows in invoices.values():
+        for row in rows:
+            key = (row["header"]["store_id"], row["item"]["medicine_id"])
+            availability[key] = availability.get(key, 0) + row["item"]["medicine_quantity"]
+    now = datetime.utcnow()
+    return [
+        UpdateOne(
+            {"store_id": store_id, "medicine_id": medicine_id},
+            {"$inc": {"available_quantity": quantity}, "$set": {"last_updated": now, "updated_by": updated_by}},
+            upsert=True
+        )
+        for (store_id, medicine_id), quantity in availability.items()
+    ]
+
+async def _bulk_write(collection, operations):
+    """
+    Unordered bulk write, returns ({upserted index: _id}, {failed index: message})
+    """
+    if not operations:
+        return {}, {}
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        return dict(result.upserted_ids), {}
+    except BulkWriteError as e:
+        details = e.details
+        upserted = {upsert["index"]: upsert["_id"] for upsert in details.get("upserted", [])}
+        return upserted, {error["index"]: error.get("errmsg", "write failed") for error in details.get("writeErrors", [])}
+
+def _header_key(rows):
+    header = rows[0]["header"]
+    return header["store_id"], header["distributor_id"], header["invoice_number"]
+
+async def _existing_invoices(invoices, mongo_db):
+    """
+    Keys of the invoices already saved, so a resubmitted file is not loaded twice
+    """
+    if not invoices:
+        return set()
+    header_keys = {_header_key(rows): invoice_key for invoice_key, rows in invoices.items()}
+    saved = await mongo_db.purchases.find(
+        {"$or": [{"store_id": store_id, "distributor_id": distributor_id, "invoice_number": invoice_number} for store_id, distributor_id, invoice_number in header_keys]},
+        {"_id": 0, "store_id": 1, "distributor_id": 1, "invoice_number": 1}
+    ).to_list(length=None)
+    return {header_keys[key] for key in ((purchase["store_id"], purchase["distributor_id"], purchase["invoice_number"]) for purchase in saved) if key in header_keys}
+
+async def _stock_ids(stock_batches, upserted, stock_errors, mongo_db):
+    """
+    Stock _id of every written batch keyed by (store_id, medicine_id, batch_number), the updated ones are read back
+    """
+    ids = {stock_batches[index]["key"]: id for index, id in upserted.items()}
+    updated = [batch["key"] for index, batch in enumerate(stock_batches) if index not in stock_errors and batch["key"] not in ids]
+    if updated:
+        stocks = await mongo_db.stocks.find(
+            {"$or": [{"store_id": store_id, "medicine_id": medicine_id, "batch_detais.batch_number": batch_number} for store_id, medicine_id, batch_number in updated]},
+            {"store_id": 1, "medicine_id": 1, "batch_detais.batch_number": 1}
+        ).to_list(length=None)
+        for stock in stocks:
+            batch_detais = stock.get("batch_detais")
+            if isinstance(batch_detais, dict):
+                batch_detais = [batch_detais]
+            for batch in batch_detais or []:
+                ids.setdefault((stock["store_id"], stock["medicine_id"], batch.get("batch_number")), stock["_id"])
+    return ids
+
+async def _revert_stock(invoice_keys, stock_batches, stock_errors, mongo_db):
+    """
+    Take the quantities of the given invoices back out of the stock batches that were written
+    """
+    operations = []
+    for index, batch in enumerate(stock_batches):
+        quantity = sum(batch["invoices"].get(invoice_key, 0) for invoice_key in invoice_keys)
+        if quantity and index not in stock_errors:
+            store_id, medicine_id, batch_number = batch["key"]
+            operations.append(UpdateOne(
+                {"store_id": store_id, "medicine_id": medicine_id, "batch_detais.batch_number": batch_number},
+                {"$inc": {"available_stock": -quantity, "batch_detais.batch_quantity": -quantity}}
+            ))
+    _, errors = await _bulk_write(mongo_db.stocks, operations)
+    for message in errors.values():
+        logger.error(f"Error reverting stock of a purchase invoice that was not loaded: {message}")
+
+def _fail_invoice(invoices, failed, invoice_key, message):
+    if invoice_key in invoices:
+        for row in invoices.pop(invoice_key):
+            row["errors"].append(message)
+        failed.add(invoice_key)
+
+async def ingest_purchases(rows, mongo_db, updated_by: str = "bulk_import"):
+    """
+    Load purchase invoice rows: upsert their stock batches, insert the purchases linked to those batches
+    and $inc the availability. An invoice already saved is skipped, an invoice whose batches or insert fail
+    is taken back out of the stock. Returns a per-row report with a summary.
+    """
+    invoices = _validate_rows(rows)
+    for invoice_key in await _existing_invoices(invoices, mongo_db):
+        for row in invoices.pop(invoice_key):
+            row["skipped"] = "invoice already loaded"
+
+    # stock first, so every purchase item can point at its stock batch
+    stock_operations, stock_batches = _stock_operations(invoices)
+    upserted, stock_errors = await _bulk_write(mongo_db.stocks, stock_operations)
+    failed = set()
+    for index, message in stock_errors.items():
+        for invoice_key in stock_batches[index]["invoices"]:
+            _fail_invoice(invoices, failed, invoice_key, f"stock batch not updated: {message}")
+    stock_ids = await _stock_ids(stock_batches, upserted, stock_errors, mongo_db)
+    for invoice_key in list(invoices):
+        store_id = invoices[invoice_key][0]["header"]["store_id"]
+        for row in invoices[invoice_key]:
+            stock_id = stock_ids.get((store_id, row["item"]["medicine_id"], row["item"]["batch_number"]))
+            if stock_id is None:
+                _fail_invoice(invoices, failed, invoice_key, "stock batch not found after the update")
+                break
+            row["item"]["batch_id"] = str(stock_id)
+
+    documents = _purchase_documents(invoices)
+    invoice_keys = list(invoices)
+    if documents:
+        try:
+            await mongo_db.purchases.insert_many(documents, ordered=False)
+            inserted = documents
+        except BulkWriteError as e:
+            not_saved = {error["index"]: error.get("errmsg", "write failed") for error in e.details.get("writeErrors", [])}
+            for index, message in not_saved.items():
+                _fail_invoice(invoices, failed, invoice_keys[index], f"purchase not saved: {message}")
+            inserted = [document for index, document in enumerate(documents) if index not in not_saved]
+        for document in inserted:
+            publish_invalidation("purchase", str(document["_id"]))
+    if failed:
+        await _revert_stock(failed, stock_batches, stock_errors, mongo_db)
+
+    for index, batch in enumerate(stock_batches):
+        for row in batch["rows"]:
+            if not row["errors"]:
+                row["stock"] = "created" if index in upserted else "updated"
+    if len(stock_errors) < len(stock_operations):
+        # the upserted and updated stock ids are not all known here, drop every cached stock
+        publish_invalidation("stock")
+    _, availability_errors = await _bulk_write(mongo_db.medicine_availability, _availability_operations(invoices, updated_by))
+    for message in availability_errors.values():
+        logger.error(f"Error updating medicine availability during purchase ingestion: {message}")
+
+    # reverted batches changed too, their inventory is recomputed as well
+    inventory_keys = {(batch["store_id"], batch["medicine_id"]) for index, batch in enumerate(stock_batches) if index not in stock_errors}
+    for store_id, medicine_id in inventory_keys:
+        publish_invalidation("medicine_availability", medicine_id, store_id=store_id)
+    await refresh_inventory(inventory_keys, mongo_db)
+
+    report = []
+    for row in rows:
+        entry = {"row": row["row"], "status": "error" if row["errors"] else "skipped" if row.get("skipped") else "loaded"}
+        if isinstance(row["item"], dict):
+            entry["medicine_id"] = row["item"].get("medicine_id")
+            entry["batch_number"] = row["item"].get("batch_number")
+        if isinstance(row["header"], dict):
+            entry["invoice_number"] = row["header"].get("invoice_number")
+        if row["errors"]:
+            entry["errors"] = row["errors"]
+        elif row.get("skipped"):
+            entry["reason"] = row["skipped"]
+        else:
+            entry["stock"] = row.get("stock")
+        report.append(entry)
+    loaded = sum(1 for entry in report if entry["status"] == "loaded")
+    skipped = sum(1 for entry in report if entry["status"] == "skipped")
+    return {
+        "summary": {
+            "rows": len(report),
+            "loaded": loaded,
+            "skipped": skipped,
+            "failed": len(report) - loaded - skipped,
+            "purchases": len(invoices),
+            "stock_batches": len(stock_operations)
+        },
+        "rows": report
+    }
@@ -0,0 +1,395 @@
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from bson import ObjectId
+from app.Service.substitute_graph import substitute_graph
+from app.Service.inventory import INVENTORY_COLLECTION, get_inventory
+import asyncio
+import os
+from typing import List
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# substitutes reported in the medicine dossier, the ones with most stock
+SUBSTITUTES_SECTION_LIMIT = int(os.getenv("SUBSTITUTES_SECTION_LIMIT", "20"))
+
+# first expiry first out allocation of the sale items against the stock batches
+async def allocate_sale_items(store_id: int, sale_items: List[dict], mongo_db):
+    """
+    Allocate sale items against the store batches, earliest expiry first.
+    Loads every candidate batch in one query and returns the allocated sale items
+    (one per batch used) with the units taken per batch and sold per medicine.
+    """
+    # an empty bulk_write raises, and a sale without items is not a sale
+    if not sale_items:
+        raise HTTPException(status_code=400, detail="Sale has no items")
+    medicine_ids = []
+    for item in sale_items:
+        if item["quantity"] <= 0:
+            raise HTTPException(status_code=400, detail="Invalid quantity")
+        if item["medicine_id"] not in medicine_ids:
+            medicine_ids.append(item["medicine_id"])
+
+    stock_cursor = mongo_db["stocks"].find(
+        {"store_id": store_id, "medicine_id": {"$in": medicine_ids}, "available_stock": {"$gt": 0}},
+        {"medicine_id": 1, "available_stock": 1, "batch_detais.expiry_date": 1}
+    ).sort([("medicine_id", 1), ("batch_detais.expiry_date", 1)])
+    stock_batches = await stock_cursor.to_list(length=None)
+
+    # batches grouped by medicine, already in expiry order
+    batches_by_medicine = {}
+    for batch in stock_batches:
+        batches_by_medicine.setdefault(batch["medicine_id"], []).append(batch)
+
+    remaining_stock = {batch["_id"]: batch["available_stock"] for batch in stock_batches}
+    taken_from_batch = {}
+    sold_by_medicine = {}
+    allocated_items = []
+
+    for item in sale_items:
+        medicine_id = item["medicine_id"]
+        quantity = item["quantity"]
+        for batch in batches_by_medicine.get(medicine_id, []):
+            if quantity <= 0:
+                break
+            batch_id = batch["_id"]
+            taken = min(quantity, remaining_stock[batch_id])
+            if taken <= 0:
+                continue
+            remaining_stock[batch_id] -= taken
+            taken_from_batch[batch_id] = taken_from_batch.get(batch_id, 0) + taken
+            quantity -= taken
+            allocated_items.append({
+                **item,
+                "batch_id": str(batch_id),
+                "expiry_date": batch["batch_detais"]["expiry_date"],
+                "quantity": taken
+            })
+        if quantity > 0:
+            raise HTTPException(status_code=400, detail=f"Insufficient stock for medicine {medicine_id}")
+        sold_by_medicine[medicine_id] = sold_by_medicine.get(medicine_id, 0) + item["quantity"]
+
+    return allocated_items, taken_from_batch, sold_by_medicine
+
+async def apply_sale_stock(store_id: int, taken_from_batch: dict, sold_by_medicine: dict, mongo_db):
+    """
+    Take the allocated units out of the batches and the availability without a transaction,
+    so a standalone mongod works as well as a replica set. Every batch update is guarded by
+    available_stock >= taken, when one loses to a concurrent sale (or fails) the decrements
+    already applied are put back and the sale is refused.
+    """
+    batches = list(taken_from_batch.items())
+    results = await asyncio.gather(*(
+        mongo_db["stocks"].update_one(
+            {"_id": batch_id, "available_stock": {"$gte": taken}},
+            {"$inc": {"available_stock": -taken, "batch_detais.batch_quantity": -taken}}
+        )
+        for batch_id, taken in batches
+    ), return_exceptions=True)
+    applied = {batch_id: taken for (batch_id, taken), result in zip(batches, results) if not isinstance(result, BaseException) and result.modified_count}
+    if len(applied) != len(batches):
+        await revert_sale_stock(store_id, applied, {}, mongo_db)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+        raise HTTPException(status_code=409, detail="Stock changed while creating the sale, please retry")
+    try:
+        if sold_by_medicine:
+            await mongo_db["medicine_availability"].bulk_write([
+                UpdateOne({"store_id": store_id, "medicine_id": medicine_id}, {"$inc": {"available_quantity": -sold}})
+                for medicine_id, sold in sold_by_medicine.items()
+            ], ordered=False)
+    except Exception:
+        await revert_sale_stock(store_id, applied, {}, mongo_db)
+        raise
+
+async def revert_sale_stock(store_id: int, taken_from_batch: dict, sold_by_medicine: dict, mongo_db):
+    """
+    Put the units of a sale that was not saved back into its batches and the availability.
+    Failures are logged, the caller is already answering with the original error.
+    """
+    try:
+        if taken_from_batch:
+            await mongo_db["stocks"].bulk_write([
+                UpdateOne({"_id": batch_id}, {"$inc": {"available_stock": taken, "batch_detais.batch_quantity": taken}})
+                for batch_id, taken in taken_from_batch.items()
+            ], ordered=False)
+        if sold_by_medicine:
+            await mongo_db["medicine_availability"].bulk_write([
+                UpdateOne({"store_id": store_id, "medicine_id": medicine_id}, {"$inc": {"available_quantity": sold}})
+                for medicine_id, sold in sold_by_medicine.items()
+            ], ordered=False)
+    except Exception as e:
+        logger.error(f"Error reverting the stock of an unsaved sale for store {store_id}: {str(e)}")
+
+# stock listing, joined to availability, pricing and purchases on the server
+def stock_listing_pipeline(store_id: int = None, after_id=None, limit: int = 100):
+    """
+    Aggregation pipeline for one page of the stock listing, ordered by the stock _id.
+    Uses the localField/foreignField + pipeline form of $lookup (MongoDB 5.0+) so the
+    joins ride the medicine_id indexes of the joined collections.
+    """
+    match = {}
+    if store_id is not None:
+        match["store_id"] = store_id
+    if after_id is not None:
+        match["_id"] = {"$gt": after_id}
+
+    same_store = {"$match": {"$expr": {"$eq": ["$store_id", "$$store_id"]}}}
+    return [
+        {"$match": match},
+        {"$sort": {"_id": 1}},
+        {"$limit": limit + 1},
+        {"$lookup": {
+            "from": INVENTORY_COLLECTION,
+            "localField": "medicine_id",
+            "foreignField": "medicine_id",
+            "let": {"store_id": "$store_id"},
+            "pipeline": [same_store, {"$project": {"_id": 0, "total_units": 1}}, {"$limit": 1}],
+            "as": "inventory"
+        }},
+        {"$lookup": {
+            "from": "pricing",
+            "localField": "medicine_id",
+            "foreignField": "medicine_id",
+            "let": {"store_id": "$store_id"},
+            "pipeline": [same_store, {"$project": {"_id": 0, "mrp": 1, "discount": 1, "net_rate": 1}}, {"$limit": 1}],
+            "as": "pricing"
+        }},
+        {"$lookup": {
+            "from": "purchases",
+            "localField": "medicine_id",
+            "foreignField": "purchase_items.medicine_id",
+            "let": {"store_id": "$store_id", "medicine_id": "$medicine_id"},
+            "pipeline": [
+                same_store,
+                {"$unwind": "$purchase_items"},
+                {"$match": {"$expr": {"$eq": ["$purchase_items.medicine_id", "$$medicine_id"]}}},
+                {"$replaceRoot": {"newRoot": "$purchase_items"}},
+                {"$project": {"_id": 0, "batch_id": 1, "unit_quantity": 1, "package_count": 1, "expiry_date": 1}}
+            ],
+            "as": "purchase_items"
+        }},
+        {"$project": {"batch_detais": 0}}
+    ]
+
+def _object_ids(ids):
+    """
+    Distinct ObjectIds from a list of string ids, skipping invalid ones
+    """
+    return list({ObjectId(str(id)) for id in ids if ObjectId.is_valid(str(id))})
+
+def _batch_numbers(stock_batches):
+    """
+    Batch numbers keyed by the string stock _id
+    """
+    batch_numbers = {}
+    for stock_batch in stock_batches:
+        batch_detais = stock_batch.get("batch_detais")
+        if isinstance(batch_detais, dict):
+            batch_detais = [batch_detais]
+        batch_numbers[str(stock_batch["_id"])] = [batch.get("batch_number") for batch in batch_detais or []]
+    return batch_numbers
+
+# medicine dossier sections, each resolved with set based lookups
+async def medicine_batches_section(medicine_id: int, mongo_db):
+    """
+    Batches of a medicine across the stores with the store price and the last purchased pack size
+    """
+    medicine_batches, prices, purchases = await asyncio.gather(
+        mongo_db.stocks.find({"medicine_id": medicine_id}).to_list(length=None),
+        mongo_db.pricing.find({"medicine_id": medicine_id}, {"store_id": 1, "mrp": 1, "discount": 1, "net_rate": 1}).to_list(length=None),
+        mongo_db.purchases.find({"purchase_items.medicine_id": medicine_id}, {"store_id": 1, "purchase_items": 1}).to_list(length=None)
+    )
+    if not medicine_batches:
+        raise HTTPException(status_code=404, detail="No batches found for the given medicine ID")
+
+    # first price entry per store, last purchased pack size per store
+    price_by_store = {}
+    for price in prices:
+        price_by_store.setdefault(price.get("store_id"), price)
+    pack_by_store = {}
+    for purchase in purchases:
+        if not isinstance(purchase.get("purchase_items"), list):
+            continue
+        for item in purchase["purchase_items"]:
+            if item.get("medicine_id") == medicine_id:
+                pack_by_store[purchase.get("store_id")] = (item.get("unit_quantity", 0), item.get("package_count", 0))
+
+    batches = []
+    for medicine_batch in medicine_batches:
+        store_id = medicine_batch.get("store_id")
+        price = price_by_store.get(store_id)
+        if not price:
+            continue
+        batch_detais = medicine_batch.get("batch_detais")
+        if isinstance(batch_detais, dict):
+            batch_detais = [batch_detais]
+        elif not isinstance(batch_detais, list):
+            raise HTTPException(status_code=400, detail="Invalid batch_detais format")
+        unit_quantity, package_count = pack_by_store.get(store_id, (0, 0))
+        for batch in batch_detais:
+            batches.append({
+                "store_id": store_id,
+                "is_stock": "In Stock" if medicine_batch.get("available_stock", 0) > 0 else "Not In Stock",
+                "batch_number": batch.get("batch_number"),
+                "expiry_date": batch.get("expiry_date"),
+                "mrp": price.get("mrp", 0),
+                "discount": price.get("discount", 0),
+                "net_rate": price.get("net_rate", 0),
+                "unit_quantity": unit_quantity,
+                "package_count": package_count
+            })
+    return batches
+
+async def medicine_purchases_section(medicine_id: int, mongo_db):
+    """
+    Purchases of a medicine with their batch numbers, the distributor is left as an id
+    so the caller can resolve every distributor name in one query
+    """
+    medicine_purchases = await mongo_db.purchases.find({"purchase_items.medicine_id": medicine_id}).to_list(length=None)
+    purchase_items = [
+        (purchase, item)
+        for purchase in medicine_purchases
+        for item in purchase["purchase_items"]
+        if item["medicine_id"] == medicine_id
+    ]
+    stock_batches = await mongo_db.stocks.find(
+        {"_id": {"$in": _object_ids([item["batch_id"] for _, item in purchase_items])}},
+        {"batch_detais.batch_number": 1}
+    ).to_list(length=None)
+    batch_numbers = _batch_numbers(stock_batches)
+
+    purchases = []
+    for purchase, item in purchase_items:
+        for batch_number in batch_numbers.get(str(item["batch_id"]), []):
+            purchases.append({
+                "store_id": purchase["store_id"],
+                "purchase_date": str(purchase["purchase_date"]),
+                "distributor_id": purchase["distributor_id"],
+                "batch_number": batch_number,
+                "price": item["price"],
+                "quantity": item["quantity"],
+                "expiry_date": str(item["expiry_date"])
+            })
+    return purchases
+
+async def medicine_sales_section(medicine_id: int, mongo_db):
+    """
+    Sales of a medicine with the customer and batch number of every sold line
+    """
+    saled_medicines = await mongo_db.sales.find({"sale_items.medicine_id": medicine_id}).to_list(length=None)
+    sale_items = [
+        (sale, item)
+        for sale in saled_medicines
+        for item in sale["sale_items"]
+        if item["medicine_id"] == medicine_id
+    ]
+    customers, stock_batches = await asyncio.gather(
+        mongo_db.customers.find(
+            {"_id": {"$in": _object_ids([sale["customer_id"] for sale in saled_medicines])}},
+            {"name": 1, "doctor_name": 1}
+        ).to_list(length=None),
+        mongo_db.stocks.find(
+            {"_id": {"$in": _object_ids([item["batch_id"] for _, item in sale_items])}},
+            {"batch_detais.batch_number": 1}
+        ).to_list(length=None)
+    )
+    customers = {str(customer["_id"]): customer for customer in customers}
+    batch_numbers = _batch_numbers(stock_batches)
+
+    sales = []
+    for sale, item in sale_items:
+        customer = customers.get(str(sale["customer_id"]), {})
+        for batch_number in batch_numbers.get(str(item["batch_id"]), []):
+            sales.append({
+                "store_id": sale["store_id"],
+                "sale_date": str(sale["sale_date"]),
+                "invoice_number": sale["invoice_id"],
+                "customer_name": customer.get("name"),
+                "doctor_name": customer.get("doctor_name"),
+                "batch_number": batch_number,
+                "mrp": item["price"],
+                "quantity": item["quantity"],
+                "expiry_date": str(item["expiry_date"])
+            })
+    return sales
+
+async def _top_available(medicine_ids: List[int], limit: int, mongo_db):
+    """
+    The limit medicines with most units in stock across the stores, the ones without stock fill the rest in their given order
+    """
+    ranked = await mongo_db[INVENTORY_COLLECTION].aggregate([
+        {"$match": {"medicine_id": {"$in": medicine_ids}, "total_units": {"$gt": 0}}},
+        {"$group": {"_id": "$medicine_id", "total_units": {"$sum": "$total_units"}}},
+        {"$sort": {"total_units": -1, "_id": 1}},
+        {"$limit": limit}
+    ]).to_list(length=None)
+    top_ids = [medicine["_id"] for medicine in ranked]
+    ranked_ids = set(top_ids)
+    top_ids.extend([id for id in medicine_ids if id not in ranked_ids][:limit - len(top_ids)])
+    return top_ids
+
+async def medicine_substitutes_section(medicine_id: int, mongo_db, limit: int = SUBSTITUTES_SECTION_LIMIT):
+    """
+    The substitutes of a medicine with most stock, each with the store it was last purchased for and its availability and price there
+    """
+    await substitute_graph.ensure_fresh()
+    substitutes = {substitute["medicine_id"]: substitute for substitute in substitute_graph.substitutes_of(medicine_id)}
+    if not substitutes:
+        return []
+    top_ids = await _top_available(list(substitutes), limit, mongo_db)
+
+    # the last purchase of each substitute decides the store it is reported for, only the used item fields leave the server
+    purchases = await mongo_db.purchases.aggregate([
+        {"$match": {"purchase_items.medicine_id": {"$in": top_ids}}},
+        {"$sort": {"purchase_date": -1, "_id": -1}},
+        {"$project": {"_id": 0, "store_id": 1, "purchase_items": {"$filter": {
+            "input": "$purchase_items",
+            "as": "item",
+            "cond": {"$in": ["$$item.medicine_id", top_ids]}
+        }}}},
+        {"$unwind": "$purchase_items"},
+        {"$group": {
+            "_id": "$purchase_items.medicine_id",
+            "store_id": {"$first": "$store_id"},
+            "unit_quantity": {"$first": "$purchase_items.unit_quantity"},
+            "price": {"$first": "$purchase_items.price"}
+        }}
+    ]).to_list(length=None)
+    last_purchase = {purchase["_id"]: purchase for purchase in purchases}
+    keys = [(purchase["store_id"], id) for id, purchase in last_purchase.items()]
+    if not keys:
+        return []
+
+    inventory, prices = await asyncio.gather(
+        get_inventory(keys, mongo_db),
+        mongo_db.pricing.find(
+            {"$or": [{"store_id": store_id, "medicine_id": id} for store_id, id in keys]},
+            {"_id": 0, "store_id": 1, "medicine_id": 1, "mrp": 1}
+        ).to_list(length=None)
+    )
+    price_by_key = {}
+    for price in prices:
+        price_by_key.setdefault((price["store_id"], price["medicine_id"]), price)
+
+    substitute_medicine = []
+    for id in top_ids:
+        if id not in last_purchase:
+            continue
+        substitute, purchase = substitutes[id], last_purchase[id]
+        store_id = purchase["store_id"]
+        availability = inventory.get((store_id, id))
+        price = price_by_key.get((store_id, id))
+        substitute_medicine.append({
+            "substitute_medicine_store_id": store_id,
+            "substitute_medicine_name": substitute["medicine_name"],
+            "substitute_manufacturer_name": substitute["manufacturer_name"],
+            "substitute_medicine_unit": purchase.get("unit_quantity"),
+            "substitute_medicine_unit_price": purchase.get("price"),
+            "is_substitute_medicine_available": ("In Stock" if availability["total_units"] > 0 else "Not In Stock") if availability else None,
+            "substitute_medicine_mrp_price": price["mrp"] if price else None
+        })
+    return substitute_medicine
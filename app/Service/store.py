@@ -4,9 +4,10 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.models.store_mysql_models import StoreDetails as StoreDetailsModel
 from app.schemas.StoreDetailsSchema import StoreDetailsCreate
 import logging
-from app.db.mysql_session import get_db
+from app.Service.cache import store_cache
 from typing import List
-from sqlalchemy import or_
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # configuring the logger
 logger = logging.getLogger(__name__)
@@ -31,20 +32,56 @@ def store_validation(store: StoreDetailsCreate, db: Session):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
     
-# cheacking wether the store is allready present in the database
-def store_validation_mobile(mobile:str, db: Session = get_db):
+def store_profile(store: dict):
+    """
+    Store profile returned by the /stores/{mobile} lookup and the user login, built from a cached store row
+    """
+    return {
+        "store_id": store["store_id"],
+        "store_name": store["store_name"],
+        "license_number": store["license_number"],
+        "gst_state_code": store["gst_state_code"],
+        "gst_number": store["gst_number"],
+        "pan": store["pan"],
+        "address": store["address"],
+        "email": store["email"],
+        "mobile": store["mobile"],
+        "owner_name": store["owner_name"],
+        "is_main_store": store["is_main_store"],
+        "latitude": store["latitude"],
+        "longitude": store["longitude"],
+        "status": store["status"],
+        "remark": store["remarks"],
+        "verification_status": store["verification_status"],
+        "created_at": store["created_at"],
+        "updated_at": store["updated_at"]
+    }
+
+def get_store_profile(mobile: str, db: Session):
     """
-    Store validation by mobile number
+    Store profile by mobile from the store cache, None when there is no such store
+    """
+    store = store_cache.get_by_name(mobile, db)
+    return store_profile(store) if store else None
+
+def get_store_profile_by_id(store_id: int, db: Session):
+    """
+    Store profile by store_id from the store cache, None when there is no such store
+    """
+    store = store_cache.get(store_id, db) if store_id is not None else None
+    return store_profile(store) if store else None
+
+async def get_store_gst_numbers(store_ids, db: AsyncSession):
+    """
+    GST numbers for a set of store ids in one query
     """
     try:
-        store = db.query(StoreDetailsModel).filter(
-            StoreDetailsModel.mobile == mobile
-            ).first()
-        if store:
-            return store
-        else:
-            return "unique"
+        if not store_ids:
+            return {}
+        result = await db.execute(select(StoreDetailsModel.store_id, StoreDetailsModel.gst_number).where(
+            StoreDetailsModel.store_id.in_(set(store_ids))
+        ))
+        return {row.store_id: row.gst_number for row in result.all()}
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
-    
\ No newline at end of file
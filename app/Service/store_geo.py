@@ -0,0 +1,179 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.store_mysql_models import StoreDetails as StoreDetailsModel
+from app.models.store_mysql_eunums import StoreVerification
+from app.db.mysql import SessionLocal
+from app.Service.cache_bus import cache_bus
+from app.Service.inventory import INVENTORY_COLLECTION
+import threading
+import asyncio
+import math
+import os
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# grid cell size in degrees, 0.1 is about 11 km of latitude
+STORE_GEO_CELL_DEGREES = float(os.getenv("STORE_GEO_CELL_DEGREES", "0.1"))
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(a), 1.0))
+
+def _cell(lat: float, lng: float):
+    return math.floor(lat / STORE_GEO_CELL_DEGREES), math.floor(lng / STORE_GEO_CELL_DEGREES)
+
+class StoreGeoIndex:
+    """
+    Grid of the active verified stores with coordinates, a query reads only the cells its radius covers.
+    Store writes mark a store dirty (locally or through the cache bus), the next query reloads it.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stores = {}  # store_id -> store
+        self._cells = {}  # (lat cell, lng cell) -> set of store_ids
+        self._dirty = set()
+        self._stale = True
+
+    def _add(self, instance):
+        if instance.active_flag != 1 or instance.verification_status != StoreVerification.VERIFIED:
+            return
+        if instance.latitude is None or instance.longitude is None:
+            return
+        store = {
+            "store_id": instance.store_id,
+            "store_name": instance.store_name,
+            "mobile": instance.mobile,
+            "address": instance.address,
+            "latitude": float(instance.latitude),
+            "longitude": float(instance.longitude)
+        }
+        self._stores[instance.store_id] = store
+        self._cells.setdefault(_cell(store["latitude"], store["longitude"]), set()).add(instance.store_id)
+
+    def _remove(self, store_id: int):
+        store = self._stores.pop(store_id, None)
+        if store is None:
+            return
+        cell = _cell(store["latitude"], store["longitude"])
+        self._cells[cell].discard(store_id)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def load(self, db: Session):
+        """
+        Build the grid from every store, the ones that are not active and verified are left out
+        """
+        instances = db.execute(select(StoreDetailsModel).where(StoreDetailsModel.active_flag == 1)).scalars().all()
+        with self._lock:
+            self._stores, self._cells = {}, {}
+            for instance in instances:
+                self._add(instance)
+            self._stale = False
+        logger.info(f"Store geo index built: {len(self._stores)} stores in {len(self._cells)} cells")
+
+    def mark_dirty_many(self, store_ids):
+        with self._lock:
+            self._dirty |= set(store_ids)
+
+    def mark_dirty(self, store_id=None):
+        with self._lock:
+            if store_id is None:
+                self._stale = True
+            else:
+                self._dirty.add(store_id)
+
+    def refresh(self):
+        """
+        Reload the dirty stores, or everything after a keyless invalidation, in its own session
+        """
+        with self._lock:
+            stale, dirty = self._stale, set(self._dirty)
+            self._dirty.clear()
+        if not stale and not dirty:
+            return
+        db = SessionLocal()
+        try:
+            if stale:
+                self.load(db)
+                return
+            instances = db.execute(select(StoreDetailsModel).where(StoreDetailsModel.store_id.in_(dirty))).scalars().all()
+        except Exception:
+            self.mark_dirty_many(dirty)
+            raise
+        finally:
+            db.close()
+        with self._lock:
+            for store_id in dirty:
+                self._remove(store_id)
+            for instance in instances:
+                self._add(instance)
+
+    async def ensure_fresh(self):
+        if self._stale or self._dirty:
+            await asyncio.to_thread(self.refresh)
+
+    def within(self, lat: float, lng: float, radius_km: float):
+        """
+        Stores within radius_km of the point with their distance, nearest first
+        """
+        lat_span = radius_km / 111.195
+        # a degree of longitude shrinks with the cosine of the latitude, the pole side of the box is the widest
+        widest = abs(lat) + lat_span
+        lng_span = 180.0 if widest >= 89.0 else min(radius_km / (111.195 * math.cos(math.radians(widest))), 180.0)
+        low_lat, low_lng = _cell(lat - lat_span, lng - lng_span)
+        high_lat, high_lng = _cell(lat + lat_span, lng + lng_span)
+        found = []
+        with self._lock:
+            # few stores in a big box, walking the occupied cells is cheaper than walking the box
+            if (high_lat - low_lat + 1) * (high_lng - low_lng + 1) > len(self._cells):
+                cells = [cell for cell in self._cells if low_lat <= cell[0] <= high_lat and low_lng <= cell[1] <= high_lng]
+            else:
+                cells = [(cell_lat, cell_lng) for cell_lat in range(low_lat, high_lat + 1) for cell_lng in range(low_lng, high_lng + 1)]
+            for cell in cells:
+                for store_id in self._cells.get(cell, ()):
+                    store = self._stores[store_id]
+                    distance = haversine_km(lat, lng, store["latitude"], store["longitude"])
+                    if distance <= radius_km:
+                        found.append((distance, store))
+        found.sort(key=lambda item: item[0])
+        return [{**store, "distance_km": round(distance, 3)} for distance, store in found]
+
+store_geo_index = StoreGeoIndex()
+
+def apply_store_invalidation(message: dict):
+    """
+    Cache bus subscriber, a changed store is reloaded on the next nearby query of this worker
+    """
+    if message.get("entity") == "store":
+        store_geo_index.mark_dirty(message.get("key"))
+
+cache_bus.subscribe(apply_store_invalidation)
+
+async def get_nearby_stores(lat: float, lng: float, radius_km: float, limit: int, mongo_db, medicine_id: int = None):
+    """
+    The limit nearest stores within the radius, only the ones with the medicine in stock when one is given.
+    The stock comes from one store_inventory read on (medicine_id, store_id) for every store in the radius.
+    """
+    await store_geo_index.ensure_fresh()
+    stores = store_geo_index.within(lat, lng, radius_km)
+    if medicine_id is None or not stores:
+        return stores[:limit]
+
+    inventories = await mongo_db[INVENTORY_COLLECTION].find(
+        {"medicine_id": medicine_id, "store_id": {"$in": [store["store_id"] for store in stores]}, "total_units": {"$gt": 0}},
+        {"_id": 0, "store_id": 1, "total_units": 1, "earliest_expiry": 1, "net_rate": 1}
+    ).to_list(length=None)
+    inventory_by_store = {inventory.pop("store_id"): inventory for inventory in inventories}
+    nearby = []
+    for store in stores:
+        inventory = inventory_by_store.get(store["store_id"])
+        if inventory is not None:
+            nearby.append({**store, **inventory})
+            if len(nearby) == limit:
+                break
+    return nearby
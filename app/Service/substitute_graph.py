@@ -0,0 +1,152 @@
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.store_mysql_models import Substitutes as SubstituteModel, MedicineMaster as MedicineMasterModel, Manufacturer as ManufacturerModel
+from app.db.mysql import SessionLocal
+from app.Service.cache_bus import cache_bus
+from app.Service.inventory import INVENTORY_COLLECTION
+import threading
+import asyncio
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# entities whose changes can move a medicine to another substitute group
+GRAPH_ENTITIES = ("substitute", "medicine", "manufacturer")
+
+class SubstituteGraph:
+    """
+    Substitute groups of the active medicines keyed by medicine_id.
+    A substitute row links a medicine to the medicine its substitute_medicine name resolves to,
+    medicines with the same generic name are linked too, and a group is everything linked
+    directly or through other medicines (symmetric and transitive).
+    Rebuilt as a whole on the first use after a substitute, medicine or manufacturer write.
+    """
+    def __init__(self):
+        self._build_lock = threading.Lock()
+        # (medicine_id -> {medicine_id, medicine_name, generic_name, manufacturer_name},
+        #  medicine_id -> tuple of every medicine_id of its group), swapped as one
+        self._snapshot = ({}, {})
+        self._stale = True
+
+    def mark_stale(self):
+        self._stale = True
+
+    def load(self, db: Session):
+        """
+        Resolve every substitute row and generic name and group the medicines with a union find
+        """
+        self._stale = False
+        medicines = db.execute(select(
+            MedicineMasterModel.medicine_id,
+            MedicineMasterModel.medicine_name,
+            MedicineMasterModel.generic_name,
+            ManufacturerModel.manufacturer_name
+        ).outerjoin(
+            ManufacturerModel, ManufacturerModel.manufacturer_id == MedicineMasterModel.manufacturer_id
+        ).where(MedicineMasterModel.active_flag == 1)).all()
+        links = db.execute(select(SubstituteModel.medicine_id, SubstituteModel.substitute_medicine)).all()
+
+        parent = {}
+
+        def find(id):
+            root = id
+            while parent[root] != root:
+                root = parent[root]
+            while parent[id] != root:
+                parent[id], id = root, parent[id]
+            return root
+
+        def union(first, second):
+            first, second = find(first), find(second)
+            if first != second:
+                parent[max(first, second)] = min(first, second)
+
+        info, id_by_name, id_by_generic = {}, {}, {}
+        for row in medicines:
+            parent[row.medicine_id] = row.medicine_id
+            info[row.medicine_id] = row._asdict()
+            id_by_name.setdefault((row.medicine_name or "").strip().lower(), row.medicine_id)
+            generic = (row.generic_name or "").strip().lower()
+            if generic:
+                union(id_by_generic.setdefault(generic, row.medicine_id), row.medicine_id)
+        unresolved = 0
+        for medicine_id, substitute_medicine in links:
+            substitute_id = id_by_name.get((substitute_medicine or "").strip().lower())
+            if medicine_id in parent and substitute_id is not None:
+                union(medicine_id, substitute_id)
+            else:
+                unresolved += 1
+
+        members = {}
+        for id in parent:
+            members.setdefault(find(id), []).append(id)
+        groups = {}
+        for group in members.values():
+            group = tuple(sorted(group))
+            for id in group:
+                groups[id] = group
+        self._snapshot = (info, groups)
+        logger.info(f"Substitute graph built: {len(info)} medicines in {len(members)} groups, {unresolved} substitute rows not resolved")
+
+    def refresh(self):
+        """
+        Rebuild in its own session when a write made the graph stale
+        """
+        with self._build_lock:
+            if not self._stale:
+                return
+            db = SessionLocal()
+            try:
+                self.load(db)
+            except Exception:
+                self._stale = True
+                raise
+            finally:
+                db.close()
+
+    async def ensure_fresh(self):
+        if self._stale:
+            await asyncio.to_thread(self.refresh)
+
+    def medicine(self, medicine_id: int):
+        return self._snapshot[0].get(medicine_id)
+
+    def substitutes_of(self, medicine_id: int):
+        """
+        Every other medicine of the group, empty when the medicine is unknown or has none
+        """
+        medicines, groups = self._snapshot
+        return [medicines[id] for id in groups.get(medicine_id, ()) if id != medicine_id]
+
+substitute_graph = SubstituteGraph()
+
+def apply_graph_invalidation(message: dict):
+    """
+    Cache bus subscriber, a write to any of GRAPH_ENTITIES rebuilds the graph of this worker on its next use
+    """
+    if message.get("entity") in GRAPH_ENTITIES:
+        substitute_graph.mark_stale()
+
+cache_bus.subscribe(apply_graph_invalidation)
+
+async def get_available_substitutes(medicine_id: int, store_id: int, mongo_db):
+    """
+    Substitutes of a medicine the store has in stock, cheapest first (unpriced ones last).
+    One store_inventory read by (medicine_id, store_id) covers stock and price of the whole group.
+    """
+    await substitute_graph.ensure_fresh()
+    if substitute_graph.medicine(medicine_id) is None:
+        raise HTTPException(status_code=404, detail="Medicine not found")
+    substitutes = {substitute["medicine_id"]: substitute for substitute in substitute_graph.substitutes_of(medicine_id)}
+    if not substitutes:
+        return []
+
+    inventories = await mongo_db[INVENTORY_COLLECTION].find(
+        {"medicine_id": {"$in": list(substitutes)}, "store_id": store_id, "total_units": {"$gt": 0}},
+        {"_id": 0, "medicine_id": 1, "total_units": 1, "batch_count": 1, "earliest_expiry": 1, "net_rate": 1}
+    ).to_list(length=None)
+    inventories.sort(key=lambda inventory: (inventory.get("net_rate") is None, inventory.get("net_rate") or 0, -inventory["total_units"]))
+    return [{**substitutes[inventory["medicine_id"]], **inventory} for inventory in inventories]
@@ -1,11 +1,15 @@
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.utils import is_duplicate_key
 from app.models.store_mysql_models import Category as CategoryModel
 from app.schemas.CategorySchema import Category as CategorySchema, CategoryCreate
 import logging
 from typing import List
 from datetime import datetime
 from app.Service.categoty import check_categoty_available
+from app.Service.pagination import PageParams, sql_page
+from app.Service.cache_bus import publish_invalidation
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -17,9 +21,7 @@ def creating_category_record(category:CategoryCreate, db: Session):
     Creating category record
     """
     try:
-        category_available = check_categoty_available(name = category.category_name, db=db)
-        if category_available!="unique":
-            raise HTTPException(status_code=400, detail="Category already exists")
+        # the unique category_name index rejects duplicates
         db_category = CategoryModel(
             category_name = category.category_name,
             created_at = datetime.now(),
@@ -29,28 +31,26 @@ def creating_category_record(category:CategoryCreate, db: Session):
         db.add(db_category)
         db.commit()
         db.refresh(db_category)
+        publish_invalidation("category", db_category.category_id)
         return db_category
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Category already exists")
+        logger.error(f"Integrity error on category record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid category record: " + str(e.orig))
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e)+ " while creating category record")
 
-def get_category_list(db:Session):
+def get_category_list(params: PageParams, db: Session):
     """
     Get list of all category
     """
     try:
-        categorys = db.query(CategoryModel).filter(CategoryModel.active_flag == 1).all()
-        category_list = []
-        for category in categorys:
-            category_data = {
-                "category_id": category.category_id,
-                "category_name": category.category_name,
-                "created_at": category.created_at,
-                "updated_at": category.updated_at,
-                "active_flag": category.active_flag
-            }
-            category_list.append(category_data)
-        return category_list
+        return sql_page(db, CategoryModel, params, "category", sorts=("category_name",), filters={"active_flag": 1})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -89,7 +89,14 @@ def update_category_record(category_name: str, category: CategoryCreate, db: Ses
         db_category.updated_at = datetime.now()
         db.commit()
         db.refresh(db_category)
+        publish_invalidation("category", db_category.category_id, name=category_name)
         return db_category
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Category already exists")
+        logger.error(f"Integrity error on category record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid category record: " + str(e.orig))
     except Exception as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
@@ -110,6 +117,7 @@ def activate_category_record(category_name, active_flag, db:Session):
         db_category.updated_at = datetime.now()
         db.commit()
         db.refresh(db_category)
+        publish_invalidation("category", db_category.category_id)
         return db_category
     except Exception as e:
         db.rollback()
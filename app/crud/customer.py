@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException
 from typing import List
 from app.db.mongodb import get_database
+from app.Service.cache_bus import publish_invalidation
 from app.models.store_mongodb_models import Customer
 import logging
 from bson import ObjectId
@@ -17,6 +18,7 @@ async def create_customer_collection(customer: Customer, db=Depends(get_database
     try:
         customer_dict = customer.dict()
         customer_id = await db.customers.insert_one(customer_dict)
+        publish_invalidation("customer", str(customer_id.inserted_id))
         customer_dict["_id"] = str(customer_id.inserted_id)
         return customer_dict
     except Exception as e:
@@ -42,6 +44,7 @@ async def update_customer_collection(customer_id: str, customer: Customer, db=De
     """
     try:
         update_result = await db.customers.update_one({"_id": ObjectId(str(customer_id))}, {"$set": customer.dict()})
+        publish_invalidation("customer", customer_id)
         if update_result.modified_count == 1:
             updated_customer = await db.customers.find_one({"_id": ObjectId(str(customer_id))})
             return updated_customer
@@ -57,6 +60,7 @@ async def delete_customer_collection(customer_id: str, db=Depends(get_database))
     """
     try:
         delete_result = await db.customers.delete_one({"_id": ObjectId(str(customer_id))})
+        publish_invalidation("customer", customer_id)
         if delete_result.deleted_count == 1:
             return {"message": "Customer deleted successfully"}
         else:
@@ -1,12 +1,15 @@
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from app.utils import is_duplicate_key
 from app.models.store_mysql_models import Distributor as DistributorModel
 from app.schemas.DistributorSchema import Distributor as DistributorSchema, DistributorCreate
 import logging
 from typing import List
 from datetime import datetime
 from app.Service.distributor import check_distributor_available
+from app.Service.pagination import PageParams, sql_page
+from app.Service.cache_bus import publish_invalidation
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -18,9 +21,7 @@ def creating_distributor_record(distributor:DistributorCreate, db: Session):
     Creating distributor record
     """
     try:
-        verify_distributor = check_distributor_available(name = distributor.distributor_name, db=db)
-        if verify_distributor!="unique":
-            raise HTTPException(status_code=400, detail="Distributor already exists")
+        # the unique distributor_name index rejects duplicates
         db_distributor = DistributorModel(
             distributor_name=distributor.distributor_name,
             created_at = datetime.now(),
@@ -30,28 +31,26 @@ def creating_distributor_record(distributor:DistributorCreate, db: Session):
         db.add(db_distributor)
         db.commit()
         db.refresh(db_distributor)
+        publish_invalidation("distributor", db_distributor.distributor_id)
         return db_distributor
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Distributor already exists")
+        logger.error(f"Integrity error on distributor record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid distributor record: " + str(e.orig))
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-def get_all_distributors(db:Session):
+def get_all_distributors(params: PageParams, db: Session):
     """
     Get all distributors by active_flag=1
     """
     try:
-        distributors = db.query(DistributorModel).filter(DistributorModel.active_flag == 1).all()
-        distributors_list = []
-        for distributor in distributors:
-            distributor_data = {
-                "distributor_id": distributor.distributor_id,
-                "distributor_name": distributor.distributor_name,
-                "created_at": distributor.created_at,
-                "updated_at": distributor.updated_at,
-                "active_flag": distributor.active_flag  
-            }
-            distributors_list.append(distributor_data)
-        return distributors_list
+        return sql_page(db, DistributorModel, params, "distributor", sorts=("distributor_name",), filters={"active_flag": 1})
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
   
@@ -89,7 +88,14 @@ def update_distributor_record(distributor_name: str, distributor: DistributorCre
         db_distributor.updated_at = datetime.now()
         db.commit()
         db.refresh(db_distributor)
+        publish_invalidation("distributor", db_distributor.distributor_id, name=distributor_name)
         return db_distributor
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Distributor already exists")
+        logger.error(f"Integrity error on distributor record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid distributor record: " + str(e.orig))
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
@@ -110,6 +116,7 @@ def activate_distributor_record(distributor_name, active_flag, db:Session):
         db_distributor.updated_at = datetime.now()
         db.commit()
         db.refresh(db_distributor)
+        publish_invalidation("distributor", db_distributor.distributor_id)
         return db_distributor
     except Exception as e:
         db.rollback()
@@ -1,12 +1,15 @@
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.utils import is_duplicate_key
 from app.db.mysql import get_db
 from app.models.store_mysql_models import Manufacturer as ManufacturerModel
 from app.schemas.ManufacturerSchema import Manufacturer as ManufacturerSchema, ManufacturerCreate
 import logging
 from typing import List
 from datetime import datetime
-from app.Service.manufacturer import check_manufacturer_available
+from app.Service.pagination import PageParams, sql_page
+from app.Service.cache_bus import publish_invalidation
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -17,10 +20,7 @@ def create_manufacturer_record(manufacturer:ManufacturerCreate, db: Session = ge
     Creating manufacturer record
     """
     try:
-        manufacturer_available = check_manufacturer_available(name=manufacturer.manufacturer_name, db=db)
-        if manufacturer_available != "unique":
-            raise HTTPException(status_code=400, detail="Manufacturer already exists")
-        
+        # the unique manufacturer_name index rejects duplicates
         db_manufacturer = ManufacturerModel(
             manufacturer_name = manufacturer.manufacturer_name,
             created_at = datetime.now(),
@@ -30,29 +30,27 @@ def create_manufacturer_record(manufacturer:ManufacturerCreate, db: Session = ge
         db.add(db_manufacturer)
         db.commit()
         db.refresh(db_manufacturer)
+        publish_invalidation("manufacturer", db_manufacturer.manufacturer_id)
         return db_manufacturer
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Manufacturer already exists")
+        logger.error(f"Integrity error on manufacturer record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid manufacturer record: " + str(e.orig))
     except Exception as e:
         logger.error(f"Error creating manufacturer record: {e}")
         db.rollback()
         raise HTTPException(status_code=500, detail="Error creating manufacturer record: " + str(e))
 
-def get_manufacturer_list(db: Session):
+def get_manufacturer_list(params: PageParams, db: Session):
     """
     Get list of all manufacturers
     """
     try:
-        manufacturers = db.query(ManufacturerModel).filter(ManufacturerModel.active_flag == 1).all()
-        manufacturer_list = []
-        for manufacturer in manufacturers:
-            manufacturer_data = {
-                "manufacturer_id": manufacturer.manufacturer_id,
-                "manufacturer_name": manufacturer.manufacturer_name,
-                "created_at": manufacturer.created_at,
-                "updated_at": manufacturer.updated_at,
-                "active_flag": manufacturer.active_flag
-            }
-            manufacturer_list.append(manufacturer_data)
-        return manufacturer_list
+        return sql_page(db, ManufacturerModel, params, "manufacturer", sorts=("manufacturer_name",), filters={"active_flag": 1})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting manufacturer list: {e}")
         raise HTTPException(status_code=500, detail="Error getting manufacturer list: " + str(e))
@@ -91,7 +89,14 @@ def update_manufacturer_record(manufacturer_name: str, manufacturer: Manufacture
         db_manufacturer.updated_at = datetime.now()
         db.commit()
         db.refresh(db_manufacturer)
+        publish_invalidation("manufacturer", db_manufacturer.manufacturer_id, name=manufacturer_name)
         return db_manufacturer
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Manufacturer already exists")
+        logger.error(f"Integrity error on manufacturer record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid manufacturer record: " + str(e.orig))
     except Exception as e:
         logger.error(f"Error updating manufacturer record: {e}")
         db.rollback()
@@ -112,6 +117,7 @@ def activate_manufacturer_record(manufacturer_name, active_flag, db:Session):
         db_manufacturer.updated_at = datetime.now()
         db.commit()
         db.refresh(db_manufacturer)
+        publish_invalidation("manufacturer", db_manufacturer.manufacturer_id)
         return db_manufacturer
     except Exception as e:
         logger.error(f"Error updating manufacturer record: {e}")
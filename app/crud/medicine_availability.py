@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException
 from typing import List
 from app.db.mongodb import get_database
+from app.Service.cache_bus import publish_invalidation
 from app.models.store_mongodb_models import MedicineAvailability
 import logging
 from bson import ObjectId
@@ -17,6 +18,7 @@ async def create_medicine_availability_collection(medicine_availability: Medicin
     try:
         medicine_availability_dict = medicine_availability.dict()
         result = await db.medicine_availability.insert_one(medicine_availability_dict)
+        publish_invalidation("medicine_availability", str(result.inserted_id))
         medicine_availability_dict["_id"] = str(result.inserted_id)
         logger.info(f"Medicine availability created with ID: {medicine_availability_dict['_id']}")
         return medicine_availability_dict
@@ -44,6 +46,7 @@ async def update_medicine_availability_collection(medicine_availability_id: str,
     """
     try:
         update_result = await db.medicine_availability.update_one({"_id": ObjectId(id)}, {"$set": medicine_availability.dict()})
+        publish_invalidation("medicine_availability", medicine_availability_id)
         if update_result.modified_count == 1:
             updated_medicine_availability = await db.medicine_availability.find_one({"_id": ObjectId(id)})
             if updated_medicine_availability:
@@ -60,6 +63,7 @@ async def delete_medicine_availability_collection(medicine_availability_id: str,
     """
     try:
         delete_result = await db.medicine_availability.delete_one({"_id": ObjectId(id)})
+        publish_invalidation("medicine_availability", medicine_availability_id)
         if delete_result.deleted_count == 1:
             return {"message": "Medicine availability deleted successfully"}
         raise HTTPException(status_code=404, detail="Medicine availability not found")
@@ -10,7 +10,10 @@ from app.utils import validate_by_id
 import logging
 from datetime import datetime
 from app.Service.medicine_master import check_medicine_available
-from sqlalchemy.exc import SQLAlchemyError
+from app.Service.pagination import PageParams, sql_page
+from app.Service.cache_bus import publish_invalidation
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from app.utils import is_duplicate_key
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -30,11 +33,7 @@ def create_medicine_master_record(medicine_master:MedicineMasterCreate, db: Sess
         if not validate_by_id(id=medicine_master.manufacturer_id, model=Manufacturer, field="manufacturer_id"):
             raise HTTPException(status_code=400, detail="Invalid manufacturer_id")
         
-        # Validate Medicine name is Available
-        validate_medicine_name_available = check_medicine_available(name=medicine_master.medicine_name, db=db)
-        if validate_medicine_name_available!="unique":
-            raise HTTPException(status_code=400, detail="Medicine already exists")
-        
+        # the unique medicine_name index rejects duplicates
         db_medicine_master = MedicineMasterModel(
             medicine_name = medicine_master.medicine_name,
             generic_name = medicine_master.generic_name,
@@ -52,35 +51,26 @@ def create_medicine_master_record(medicine_master:MedicineMasterCreate, db: Sess
         db.add(db_medicine_master)
         db.commit()
         db.refresh(db_medicine_master)
+        publish_invalidation("medicine", db_medicine_master.medicine_id)
         return db_medicine_master
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Medicine already exists")
+        logger.error(f"Integrity error on medicine record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid medicine record: " + str(e.orig))
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-def get_medicine_list(db:Session):
+def get_medicine_list(params: PageParams, db: Session):
     """
     Get Medicine list by active_flag=1
     """
     try:
-        medicines = db.query(MedicineMasterModel).filter(MedicineMasterModel.active_flag == 1).all()
-        medicines_list = []
-        for medicine in medicines:
-            medicine_data = {
-                "medicine_id": medicine.medicine_id,
-                "medicine_name": medicine.medicine_name,
-                "generic_name": medicine.generic_name,
-                "hsn_code": medicine.hsn_code,
-                "formulation": medicine.formulation,
-                "strength": medicine.strength,
-                "unit_of_measure": medicine.unit_of_measure,
-                "manufacturer_id": medicine.manufacturer_id,
-                "category_id": medicine.category_id,
-                "created_at": medicine.created_at,
-                "updated_at": medicine.updated_at,
-                "active_flag": medicine.active_flag 
-            }
-            medicines_list.append(medicine_data)
-        return medicines_list
+        return sql_page(db, MedicineMasterModel, params, "medicine", sorts=("medicine_name",), filters={"active_flag": 1})
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
@@ -138,7 +128,14 @@ def update_medicine_master_record(medicine_name: str, medicine_master: MedicineM
         
         db.commit()
         db.refresh(db_medicine_master)
+        publish_invalidation("medicine", db_medicine_master.medicine_id, name=medicine_name)
         return db_medicine_master
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Medicine already exists")
+        logger.error(f"Integrity error on medicine record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid medicine record: " + str(e.orig))
     except Exception as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
@@ -159,6 +156,7 @@ def activate_medicine_record(medicine_name, active_flag, db:Session):
         db_medicine_master.updated_at = datetime.now()
         db.commit()
         db.refresh(db_medicine_master)
+        publish_invalidation("medicine", db_medicine_master.medicine_id)
         return db_medicine_master
     except Exception as e:
         db.rollback()
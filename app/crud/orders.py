@@ -3,6 +3,7 @@ from bson import ObjectId
 from typing import List
 from pydantic import parse_obj_as
 from app.db.mongodb import get_database
+from app.Service.cache_bus import publish_invalidation
 from app.models.store_mongodb_models import Order
 import logging
 from bson import ObjectId
@@ -18,6 +19,7 @@ async def create_order_collection(order: Order, db=Depends(get_database)):
     try:
         order_dict = order.dict(by_alias=True)
         result = await db.orders.insert_one(order_dict)
+        publish_invalidation("order", str(result.inserted_id))
         order_dict["_id"] = str(result.inserted_id)
         logger.info(f"Order created with ID: {order_dict['_id']}")
         return order_dict
@@ -46,6 +48,7 @@ async def update_order_collection(order_id: str, order: Order, db=Depends(get_da
     try:
         order_dict = order.dict(by_alias=True)
         update_result = await db.orders.update_one({"_id": ObjectId(order_id)}, {"$set": order_dict})
+        publish_invalidation("order", order_id)
         if update_result.modified_count == 1:
             order_dict["_id"] = str(order_dict["_id"])
             return order_dict
@@ -60,6 +63,7 @@ async def delete_order_collection(order_id: str, db=Depends(get_database)):
     """
     try:
         delete_result = await db.orders.delete_one({"_id": ObjectId(order_id)})
+        publish_invalidation("order", order_id)
         if delete_result.deleted_count == 1:
             return {"message": "Order deleted successfully"}
         raise HTTPException(status_code=404, detail="Order not found")
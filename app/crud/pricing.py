@@ -2,6 +2,8 @@ from fastapi import Depends, HTTPException
 from typing import List
 from datetime import datetime
 from app.db.mongodb import get_database
+from app.Service.cache_bus import publish_invalidation
+from app.Service.inventory import refresh_inventory
 from app.models.store_mongodb_models import Pricing
 import logging
 from bson import ObjectId
@@ -19,6 +21,9 @@ async def create_pricing_collection(pricing: Pricing, db=Depends(get_database)):
         pricing_dict = pricing.dict()
         pricing_dict["updated_on"] = datetime.utcnow()
         result = await db.pricing.insert_one(pricing_dict)
+        publish_invalidation("pricing", str(result.inserted_id))
+        # the inventory carries the current net rate
+        await refresh_inventory([(pricing_dict["store_id"], pricing_dict["medicine_id"])], db)
         pricing_dict["_id"] = str(result.inserted_id)
         return pricing_dict
     except Exception as e:
@@ -49,7 +54,13 @@ async def update_pricing_collection(pricing_id: str, pricing: Pricing, db=Depend
     try:
         pricing_dict = pricing.dict()
         pricing_dict["updated_on"] = datetime.utcnow()
+        previous = await db.pricing.find_one({"_id": ObjectId(str(pricing_id))}, {"store_id": 1, "medicine_id": 1})
         update_result = await db.pricing.update_one({"_id": ObjectId(str(pricing_id))}, {"$set": pricing_dict})
+        publish_invalidation("pricing", pricing_id)
+        inventory_keys = [(pricing_dict["store_id"], pricing_dict["medicine_id"])]
+        if previous:
+            inventory_keys.append((previous.get("store_id"), previous.get("medicine_id")))
+        await refresh_inventory(inventory_keys, db)
         if update_result.modified_count == 1:
             updated_pricing = await db.pricing.find_one({"_id": ObjectId(str(pricing_id))})
             updated_pricing["_id"] = str(updated_pricing["_id"])
@@ -66,8 +77,10 @@ async def delete_pricing_collection(pricing_id: str, db=Depends(get_database)):
     Deleting the pricing collection in the database.
     """
     try:
-        delete_result = await db.pricing.delete_one({"_id": ObjectId(str(pricing_id))})
-        if delete_result.deleted_count == 1:
+        previous = await db.pricing.find_one_and_delete({"_id": ObjectId(str(pricing_id))}, {"store_id": 1, "medicine_id": 1})
+        publish_invalidation("pricing", pricing_id)
+        if previous:
+            await refresh_inventory([(previous.get("store_id"), previous.get("medicine_id"))], db)
             return {"message": "Pricing deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Pricing not found")
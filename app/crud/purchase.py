@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException
 from bson import ObjectId
 from typing import List
 from app.db.mongodb import get_database
+from app.Service.cache_bus import publish_invalidation
 from app.models.store_mongodb_models import Purchase
 import logging
 
@@ -17,6 +18,7 @@ async def create_purchase_collection(purchase: Purchase, db=Depends(get_database
     try:
         purchase_dict = purchase.dict(by_alias=True)
         result = await db.purchases.insert_one(purchase_dict)
+        publish_invalidation("purchase", str(result.inserted_id))
         purchase_dict["_id"] = str(result.inserted_id)
         logger.info(f"Purchase created with ID: {purchase_dict['_id']}")
         return purchase_dict
@@ -47,6 +49,7 @@ async def update_purchase_collection(purchase_id: str, purchase: Purchase, db=De
     try:
         purchase_dict = purchase.dict(by_alias=True)
         update_result = await db.purchases.update_one({"_id": ObjectId(purchase_id)}, {"$set": purchase_dict})
+        publish_invalidation("purchase", purchase_id)
         if update_result.modified_count == 1:
             purchase_dict["_id"] = str(purchase_dict["_id"])
             return purchase_dict
@@ -62,6 +65,7 @@ async def delete_purchase_collection(purchase_id: str, db=Depends(get_database))
     """
     try:
         delete_result = await db.purchases.delete_one({"_id": ObjectId(purchase_id)})
+        publish_invalidation("purchase", purchase_id)
         if delete_result.deleted_count == 1:
             return {"message": "Purchase deleted successfully"}
         raise HTTPException(status_code=404, detail="Purchase not found")
@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException
 from bson import ObjectId
 from typing import List
 from app.db.mongodb import get_database
+from app.Service.cache_bus import publish_invalidation
 from app.models.store_mongodb_models import Sale
 import logging
 
@@ -16,6 +17,7 @@ async def create_sale_collection(sale: Sale, db=Depends(get_database)):
     try:
         sale_dict = sale.dict(by_alias=True)
         result = await db.sales.insert_one(sale_dict)
+        publish_invalidation("sale", str(result.inserted_id))
         sale_dict["_id"] = str(result.inserted_id)
         logger.info(f"Sale created with ID: {sale_dict['_id']}")
         return sale_dict
@@ -44,6 +46,7 @@ async def update_sale_collection(sale_id: str, sale: Sale, db=Depends(get_databa
     try:
         sale_dict = sale.dict(by_alias=True)
         update_result = await db.sales.update_one({"_id": ObjectId(sale_id)}, {"$set": sale_dict})
+        publish_invalidation("sale", sale_id)
         if update_result.modified_count == 1:
             sale_dict["_id"] = str(sale_dict["_id"])
             return sale_dict
@@ -58,6 +61,7 @@ async def delete_sale_collection(sale_id: str, db=Depends(get_database)):
     """
     try:
         delete_result = await db.sales.delete_one({"_id": ObjectId(sale_id)})
+        publish_invalidation("sale", sale_id)
         if delete_result.deleted_count == 1:
             return {"message": "Sale order deleted successfully"}
         raise HTTPException(status_code=404, detail="Sale order not found")
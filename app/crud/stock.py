@@ -2,6 +2,8 @@ from fastapi import Depends, HTTPException
 from bson import ObjectId
 from typing import List
 from app.db.mongodb import get_database
+from app.Service.cache_bus import publish_invalidation
+from app.Service.inventory import refresh_inventory
 from app.models.store_mongodb_models import Stock
 import logging
 from bson import ObjectId
@@ -17,6 +19,8 @@ async def create_stock_collection(stock: Stock, db=Depends(get_database)):
     try:
         stock_dict = stock.dict(by_alias=True)
         result = await db.stocks.insert_one(stock_dict)
+        publish_invalidation("stock", str(result.inserted_id))
+        await refresh_inventory([(stock_dict["store_id"], stock_dict["medicine_id"])], db)
         stock_dict["_id"] = str(result.inserted_id)
         logger.info(f"stock created with ID: {stock_dict['_id']}")
         return stock_dict
@@ -43,7 +47,14 @@ async def update_stock_collection(stock_id: str, stock: Stock, db=Depends(get_da
     """
     try:
         stock_dict = stock.dict(by_alias=True)
+        # the batch may move to another store or medicine, both inventories are refreshed
+        previous = await db.stocks.find_one({"_id": ObjectId(stock_id)}, {"store_id": 1, "medicine_id": 1})
         update_result = await db.stocks.update_one({"_id": ObjectId(stock_id)}, {"$set": stock_dict})
+        publish_invalidation("stock", stock_id)
+        inventory_keys = [(stock_dict["store_id"], stock_dict["medicine_id"])]
+        if previous:
+            inventory_keys.append((previous.get("store_id"), previous.get("medicine_id")))
+        await refresh_inventory(inventory_keys, db)
         if update_result.modified_count == 1:
             return stock_dict
         raise HTTPException(status_code=404, detail="Stock not found")
@@ -56,8 +67,10 @@ async def delete_stock_collection(stock_id: str, db=Depends(get_database)):
     Deleting the stock collection from the database.
     """
     try:
-        delete_result = await db.stocks.delete_one({"_id": ObjectId(stock_id)})
-        if delete_result.deleted_count == 1:
+        previous = await db.stocks.find_one_and_delete({"_id": ObjectId(stock_id)}, {"store_id": 1, "medicine_id": 1})
+        publish_invalidation("stock", stock_id)
+        if previous:
+            await refresh_inventory([(previous.get("store_id"), previous.get("medicine_id"))], db)
             return {"status": "success"}
         raise HTTPException(status_code=404, detail="Stock not found")
     except Exception as e:
@@ -1,11 +1,14 @@
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from app.utils import is_duplicate_key
 from app.models.store_mysql_models import StoreDetails as StoreDetailsModel
 from app.schemas.StoreDetailsSchema import StoreDetailsCreate, StoreDetails
 import logging
 from typing import List
-from app.Service.store import store_validation, store_validation_mobile
+from app.Service.store import get_store_profile
+from app.Service.pagination import PageParams, sql_page
+from app.Service.cache_bus import publish_invalidation
 from datetime import datetime
 from app.db.mysql_session import get_db
 
@@ -19,9 +22,7 @@ def create_store_record(store: StoreDetailsCreate, db: Session = get_db):
     Creating store record
     """
     try:
-        valid_store = store_validation(store, db)
-        if valid_store!="unique":
-            raise HTTPException(status_code=400, detail="Store already exist")
+        # the unique mobile and email indexes reject duplicates
         db_store = StoreDetailsModel(
             store_name = store.store_name,
             license_number = store.license_number,
@@ -45,19 +46,27 @@ def create_store_record(store: StoreDetailsCreate, db: Session = get_db):
         db.add(db_store)
         db.commit()
         db.refresh(db_store)
+        publish_invalidation("store", db_store.store_id, mobile=db_store.mobile)
         return db_store
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Store already exist")
+        logger.error(f"Integrity error on store record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid store record: " + str(e.orig))
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-def get_list_stores(db: Session = get_db):
+def get_list_stores(params: PageParams, db: Session = get_db):
     """
     Get store List active_flag==1
     """
     try:
-        stores = db.query(StoreDetailsModel).filter(StoreDetailsModel.active_flag == 1).all()
-        return stores
+        return sql_page(db, StoreDetailsModel, params, "store", sorts=("store_name",), filters={"active_flag": 1})
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -67,32 +76,10 @@ def get_store_record(mobile: str, db: Session = get_db):
     Get store record by store_id
     """
     try:
-        valid_store = store_validation_mobile(mobile, db)
-        if valid_store=="unique":
+        store = get_store_profile(mobile, db)
+        if not store:
             raise HTTPException(status_code=400, detail="Store not found")
-        store = db.query(StoreDetailsModel).filter(StoreDetailsModel.mobile == mobile).first()
-        if store:
-            store_details = {
-                "store_id": store.store_id,
-                "store_name": store.store_name,
-                "license_number": store.license_number,
-                "gst_state_code": store.gst_state_code,
-                "gst_number": store.gst_number,
-                "pan": store.pan,
-                "address": store.address,
-                "email": store.email,
-                "mobile": store.mobile,
-                "owner_name": store.owner_name,
-                "is_main_store": store.is_main_store,
-                "latitude": store.latitude,
-                "longitude": store.longitude,
-                "status": store.status,
-                "remark": store.remarks,
-                "verification_status": store.verification_status,
-                "created_at": store.created_at,
-                "updated_at": store.updated_at
-            }
-            return store_details
+        return store
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -102,10 +89,7 @@ def suspend_activate_store(mobile: str, remarks_text: str, active_flag_store: in
     Suspend or Activate Store by mobile
     """
     try:
-        store_valid = store_validation_mobile(mobile, db)
-        if store_valid == "unique":
-            raise HTTPException(status_code=400, detail="Store not found")
-        
+        # one query both validates the mobile and loads the row to write
         store = db.query(StoreDetailsModel).filter(StoreDetailsModel.mobile == mobile).first()
         if store:
             store.remarks = remarks_text
@@ -113,9 +97,10 @@ def suspend_activate_store(mobile: str, remarks_text: str, active_flag_store: in
             store.updated_at = datetime.now()
             db.commit()
             db.refresh(store)
+            publish_invalidation("store", store.store_id, mobile=store.mobile)
             return store
         else:
-            raise HTTPException(status_code=404, detail="Store not found")
+            raise HTTPException(status_code=400, detail="Store not found")
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
@@ -126,10 +111,7 @@ def verify_stores(mobile: str, verification: str, db: Session = Depends(get_db))
     Verify store and update verification status
     """
     try:
-        store_valid = store_validation_mobile(mobile, db)
-        if store_valid == "unique":
-            raise HTTPException(status_code=400, detail="Store not found")
-        
+        # one query both validates the mobile and loads the row to write
         store = db.query(StoreDetailsModel).filter(StoreDetailsModel.mobile == mobile).first()
         if store:
             store.verification_status = verification
@@ -138,9 +120,10 @@ def verify_stores(mobile: str, verification: str, db: Session = Depends(get_db))
                 store.active_flag = 1
             db.commit()
             db.refresh(store)
+            publish_invalidation("store", store.store_id, mobile=store.mobile)
             return store
         else:
-            raise HTTPException(status_code=404, detail="Store not found")
+            raise HTTPException(status_code=400, detail="Store not found")
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
@@ -151,10 +134,7 @@ def update_store_record(mobile: str, store: StoreDetailsCreate, db: Session = De
     Update store record by mobile
     """
     try:
-        store_valid = store_validation_mobile(mobile, db)
-        if store_valid == "unique":
-            raise HTTPException(status_code=400, detail="Store not found")
-        
+        # one query both validates the mobile and loads the row to write
         db_store = db.query(StoreDetailsModel).filter(StoreDetailsModel.mobile == mobile).first()
         if db_store:
             db_store.store_name = store.store_name
@@ -179,9 +159,16 @@ def update_store_record(mobile: str, store: StoreDetailsCreate, db: Session = De
             
             db.commit()
             db.refresh(db_store)
+            publish_invalidation("store", db_store.store_id, mobile=db_store.mobile)
             return db_store
         else:
-            raise HTTPException(status_code=404, detail="Store not found")
+            raise HTTPException(status_code=400, detail="Store not found")
+    except IntegrityError as e:
+        db.rollback()
+        if is_duplicate_key(e):
+            raise HTTPException(status_code=400, detail="Store already exist")
+        logger.error(f"Integrity error on store record: {e.orig}")
+        raise HTTPException(status_code=400, detail="Invalid store record: " + str(e.orig))
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
@@ -7,6 +7,7 @@ from app.schemas.SubstituteSchema import SubstituteCreate, Substitute
 import logging
 from typing import List
 from app.utils import validate_by_id
+from app.Service.cache_bus import publish_invalidation
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -27,6 +28,7 @@ def create_substitute_record(substitute: SubstituteCreate, db: Session):
         db.add(db_substitute)
         db.commit()
         db.refresh(db_substitute)
+        publish_invalidation("substitute", db_substitute.medicine_id)
         return db_substitute
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
@@ -62,6 +64,7 @@ def update_substitute_record(substitute_id: int, substitute: SubstituteCreate, d
         
         db.commit()
         db.refresh(db_substitute)
+        publish_invalidation("substitute", db_substitute.medicine_id)
         return db_substitute
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
@@ -77,8 +80,10 @@ def delete_substitute_record(substitute_id: int, db: Session):
         if not db_substitute:
             raise HTTPException(status_code=404, detail="Substitute not found")
         
+        medicine_id = db_substitute.medicine_id
         db.delete(db_substitute)
         db.commit()
+        publish_invalidation("substitute", medicine_id)
         return {"message": "Substitute deleted successfully"}
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
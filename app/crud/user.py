@@ -4,7 +4,8 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.db.mysql_session import get_db
 from app.models.store_mysql_models import User as UserModel, StoreDetails
 from app.schemas.UserSchema import User as UserSchema, UserCreate
-from app.utils import get_password_hash
+from app.utils import get_password_hash, resolve_password_hash, verify_and_update_password
+from app.Service.cache_bus import publish_invalidation
 import logging
 
 # Configure logger
@@ -27,6 +28,7 @@ def create_user_record(user: UserCreate, db: Session = Depends(get_db)):
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
+        publish_invalidation("user", db_user.user_id)
         return db_user
     except SQLAlchemyError as e:
         db.rollback()
@@ -56,7 +58,8 @@ def update_user_record(user_id: int, user: UserCreate, db: Session = Depends(get
         if not db_user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        hashed_password = get_password_hash(user.password_hash)
+        # unchanged passwords keep their hash instead of paying for a new one
+        hashed_password = resolve_password_hash(user.password_hash, db_user.password_hash)
         db_user.username = user.username
         db_user.password_hash = hashed_password
         db_user.role = user.role
@@ -64,6 +67,7 @@ def update_user_record(user_id: int, user: UserCreate, db: Session = Depends(get
         
         db.commit()
         db.refresh(db_user)
+        publish_invalidation("user", db_user.user_id)
         return db_user
     except SQLAlchemyError as e:
         db.rollback()
@@ -81,8 +85,34 @@ def delete_user_record(user_id: int, db: Session = Depends(get_db)):
         
         db.delete(db_user)
         db.commit()
+        publish_invalidation("user", user_id)
         return db_user
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database error: " + str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
+def authenticate_user_record(username: str, password: str, db: Session = Depends(get_db)):
+    """
+    Verify a user password, a hash below the current work factor is upgraded in place
+    """
+    try:
+        db_user = db.query(UserModel).filter(UserModel.username == username).first()
+        if not db_user or not db_user.password_hash:
+            raise HTTPException(status_code=401, detail="Invalid username or password")
+        try:
+            valid, new_hash = verify_and_update_password(password, db_user.password_hash)
+        except ValueError:
+            valid, new_hash = False, None
+        if not valid:
+            raise HTTPException(status_code=401, detail="Invalid username or password")
+        if new_hash:
+            db_user.password_hash = new_hash
+            db.commit()
+            db.refresh(db_user)
+            publish_invalidation("user", db_user.user_id)
+        return db_user
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -0,0 +1,179 @@
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import OperationFailure
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import sys
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+# Declared indexes for the hot query shapes, keyed by collection.
+# Equality fields come first, then the sort fields, then the range fields.
+INDEXES = {
+    "stocks": [
+        # FEFO allocation: store + medicine, earliest expiry first, only batches with stock left
+        IndexModel([("store_id", ASCENDING), ("medicine_id", ASCENDING), ("batch_detais.expiry_date", ASCENDING), ("available_stock", ASCENDING)], name="stocks_store_medicine_expiry_available"),
+        # medicine dossier batches across every store
+        IndexModel([("medicine_id", ASCENDING)], name="stocks_medicine"),
+        # batch key of the purchase ingestion upserts, batches without a batch number are left out
+        IndexModel([("store_id", ASCENDING), ("medicine_id", ASCENDING), ("batch_detais.batch_number", ASCENDING)], name="stocks_store_medicine_batch", unique=True, partialFilterExpression={"batch_detais.batch_number": {"$type": "string"}}),
+        # stock export of a store in _id order
+        IndexModel([("store_id", ASCENDING), ("_id", ASCENDING)], name="stocks_store_id"),
+    ],
+    "medicine_availability": [
+        # medicine_id first so the $lookup on medicine_id can use it as well as the point reads
+        IndexModel([("medicine_id", ASCENDING), ("store_id", ASCENDING)], name="medicine_availability_medicine_store"),
+    ],
+    "store_inventory": [
+        # point reads by (store_id, medicine_id), $lookup by medicine_id and the $merge key of the refresh
+        IndexModel([("medicine_id", ASCENDING), ("store_id", ASCENDING)], name="store_inventory_medicine_store", unique=True),
+    ],
+    "pricing": [
+        IndexModel([("medicine_id", ASCENDING), ("store_id", ASCENDING)], name="pricing_medicine_store"),
+    ],
+    "purchases": [
+        IndexModel([("purchase_items.medicine_id", ASCENDING), ("store_id", ASCENDING)], name="purchases_item_medicine_store"),
+        IndexModel([("purchase_date", ASCENDING), ("_id", ASCENDING)], name="purchases_date"),
+        IndexModel([("store_id", ASCENDING), ("purchase_date", ASCENDING), ("_id", ASCENDING)], name="purchases_store_date"),
+        # one purchase per supplier invoice, the bulk ingestion skips invoices already loaded
+        IndexModel([("store_id", ASCENDING), ("distributor_id", ASCENDING), ("invoice_number", ASCENDING)], name="purchases_store_distributor_invoice", unique=True),
+    ],
+    "sales": [
+        IndexModel([("sale_items.medicine_id", ASCENDING)], name="sales_item_medicine"),
+        # sales export paged on (sale_date, _id), with and without a store
+        IndexModel([("sale_date", ASCENDING), ("_id", ASCENDING)], name="sales_date"),
+        IndexModel([("store_id", ASCENDING), ("sale_date", ASCENDING), ("_id", ASCENDING)], name="sales_store_date"),
+    ],
+    "orders": [
+        IndexModel([("customer_id", ASCENDING), ("order_status", ASCENDING)], name="orders_customer_status"),
+        # delivered sales history paged on (order_date, _id)
+        IndexModel([("order_status", ASCENDING), ("order_date", ASCENDING), ("_id", ASCENDING)], name="orders_status_date"),
+    ],
+}
+
+# Representative filters of the hot paths, checked with explain() for a COLLSCAN
+HOT_QUERIES = [
+    ("sale allocation", "stocks", {"store_id": 1, "medicine_id": {"$in": [1, 2]}, "available_stock": {"$gt": 0}}, [("medicine_id", 1), ("batch_detais.expiry_date", 1)]),
+    ("dossier batches", "stocks", {"medicine_id": 1}, None),
+    ("availability point read", "medicine_availability", {"store_id": 1, "medicine_id": 1}, None),
+    ("inventory point read", "store_inventory", {"store_id": 1, "medicine_id": 1}, None),
+    ("nearby stores with stock", "store_inventory", {"medicine_id": 1, "store_id": {"$in": [1, 2]}, "total_units": {"$gt": 0}}, None),
+    ("available substitutes", "store_inventory", {"medicine_id": {"$in": [1, 2]}, "store_id": 1, "total_units": {"$gt": 0}}, None),
+    ("pricing point read", "pricing", {"store_id": 1, "medicine_id": 1}, None),
+    ("purchases by medicine", "purchases", {"purchase_items.medicine_id": 1}, None),
+    ("purchases by date", "purchases", {"purchase_date": {"$gte": datetime(2024, 1, 1), "$lt": datetime(2024, 2, 1)}}, [("purchase_date", 1), ("_id", 1)]),
+    ("sales by medicine", "sales", {"sale_items.medicine_id": 1}, None),
+    ("sales export", "sales", {"store_id": 1, "sale_date": {"$gte": datetime(2024, 1, 1)}}, [("sale_date", 1), ("_id", 1)]),
+    ("orders by customer", "orders", {"customer_id": "000000000000000000000000", "order_status": "delivered"}, None),
+    ("sales history", "orders", {"order_status": "delivered", "order_date": {"$gte": datetime(2024, 1, 1)}}, [("order_date", 1), ("_id", 1)]),
+]
+
+# index options that change what an index enforces or keeps, compared along with the key
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+def _key_spec(key):
+    return [(field, direction) for field, direction in dict(key).items()]
+
+def _index_spec(info: dict):
+    """
+    Key and options of an index, from index_information() or an IndexModel document
+    """
+    return {
+        "key": _key_spec(info["key"]),
+        "unique": bool(info.get("unique", False)),
+        "sparse": bool(info.get("sparse", False)),
+        "partialFilterExpression": dict(info["partialFilterExpression"]) if info.get("partialFilterExpression") else None,
+        "expireAfterSeconds": info.get("expireAfterSeconds")
+    }
+
+async def ensure_indexes(db):
+    """
+    Create every declared index, an index that already exists is a no-op.
+    A failing index (e.g. a conflicting definition or duplicates under a unique key) is logged,
+    the rest still get created and the failures are returned with the created ones.
+    """
+    created = []
+    failed = {}
+    for collection, index_models in INDEXES.items():
+        for index_model in index_models:
+            name = index_model.document["name"]
+            try:
+                await db[collection].create_indexes([index_model])
+                created.append(f"{collection}.{name}")
+            except OperationFailure as e:
+                logger.error(f"Error creating index {collection}.{name}: {str(e)}")
+                failed[f"{collection}.{name}"] = str(e)
+    logger.info(f"Mongo indexes ensured: {len(created)}, failed: {len(failed)}")
+    return {"created": created, "failed": failed}
+
+async def diff_indexes(db):
+    """
+    Declared indexes against the live ones: missing, changed (key or INDEX_OPTIONS) and undeclared indexes per collection
+    """
+    diff = {}
+    for collection, index_models in INDEXES.items():
+        live = await db[collection].index_information()
+        live_specs = {name: _index_spec(info) for name, info in live.items() if name != "_id_"}
+        declared = {index_model.document["name"]: _index_spec(index_model.document) for index_model in index_models}
+        collection_diff = {
+            "missing": sorted(name for name in declared if name not in live_specs),
+            "changed": sorted(name for name in declared if name in live_specs and live_specs[name] != declared[name]),
+            "undeclared": sorted(name for name in live_specs if name not in declared)
+        }
+        if any(collection_diff.values()):
+            diff[collection] = collection_diff
+    return diff
+
+def _plan_stages(plan):
+    stages = [plan.get("stage")]
+    for child in ("inputStage", "queryPlan"):
+        if child in plan:
+            stages.extend(_plan_stages(plan[child]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return [stage for stage in stages if stage]
+
+async def explain_hot_queries(db):
+    """
+    Winning plan stages of every hot query, flagged when the plan is a collection scan
+    """
+    report = []
+    for name, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        report.append({
+            "query": name,
+            "collection": collection,
+            "stages": stages,
+            "index_scan": "IXSCAN" in stages or "EXPRESS_IXSCAN" in stages,
+            "collection_scan": "COLLSCAN" in stages
+        })
+    return report
+
+async def _main(command: str):
+    from app.db.mongodb import get_database
+    db = get_database()
+    if command == "apply":
+        result = await ensure_indexes(db)
+        failed = bool(result["failed"])
+    elif command == "diff":
+        result = await diff_indexes(db)
+        failed = bool(result)
+    else:
+        result = await explain_hot_queries(db)
+        failed = any(query["collection_scan"] for query in result)
+    print(json.dumps(result, indent=2, default=str))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mongo index registry: apply, diff against the live indexes or explain the hot queries")
+    parser.add_argument("command", choices=["apply", "diff", "explain"])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.command)))
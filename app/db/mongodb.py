@@ -2,6 +2,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from dotenv import load_dotenv
+from app.db.pool_metrics import mongo_pool_listener
+from app.db.query_metrics import mongo_command_listener
 
 #load enviroment variables
 load_dotenv()
@@ -10,12 +12,30 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
-# Access the environment variables
-MONGO_DETAILS = os.getenv("DATABASE_URL", "mongodb://localhost:27017")
-collection_name = os.getenv("COLLECTION_NAME", "istores")
+# Access the environment variables, DATABASE_URL is only honoured when it points at MongoDB
+_legacy_url = os.getenv("DATABASE_URL", "")
+MONGO_DETAILS = os.getenv("MONGO_DATABASE_URL") or (_legacy_url if _legacy_url.startswith("mongodb") else "mongodb://localhost:27017")
+collection_name = os.getenv("MONGO_DATABASE_NAME") or os.getenv("COLLECTION_NAME", "istores")
+
+# Pool settings for the Motor client of each worker
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
 
 try:
-    client = AsyncIOMotorClient(MONGO_DETAILS)
+    client = AsyncIOMotorClient(
+        MONGO_DETAILS,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        event_listeners=[mongo_pool_listener, mongo_command_listener]
+    )
     database = client[collection_name]
     logger.info("Successfully connected to the MongoDB.")
 except Exception as e:
@@ -0,0 +1,153 @@
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from pymongo import monitoring
+import threading
+import time
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+class PoolWaitStats:
+    """
+    Thread safe counters for the time spent waiting on a pool checkout
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            if seconds > self.wait_seconds_max:
+                self.wait_seconds_max = seconds
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0
+            }
+
+class _TimedPoolMixin:
+    """
+    Times every checkout of the SQLAlchemy queue pool, including the wait for a free connection
+    """
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record_timeout()
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    wait_stats = PoolWaitStats()
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    wait_stats = PoolWaitStats()
+
+def sqlalchemy_pool_snapshot(engine):
+    """
+    Checked out, idle and overflow counts of an engine pool with its wait times
+    """
+    pool = engine.pool
+    snapshot = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0)
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        snapshot.update(wait_stats.snapshot())
+    return snapshot
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Connection pool events of the Motor client folded into counters
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = threading.local()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.check_out_failures = 0
+        self.pools_cleared = 0
+        self.wait_stats = PoolWaitStats()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        self._started.value = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.check_out_failures += 1
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            self.wait_stats.record_timeout()
+
+    def connection_checked_out(self, event):
+        # pymongo 4.7+ reports the duration itself, older versions are timed from the started event
+        duration = getattr(event, "duration", None)
+        if duration is None:
+            duration = time.perf_counter() - getattr(self._started, "value", time.perf_counter())
+        self.wait_stats.record(duration)
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = {
+                "open": self.open_connections,
+                "checked_out": self.checked_out,
+                "idle": max(self.open_connections - self.checked_out, 0),
+                "check_out_failures": self.check_out_failures,
+                "pools_cleared": self.pools_cleared
+            }
+        snapshot.update(self.wait_stats.snapshot())
+        return snapshot
+
+mongo_pool_listener = MongoPoolListener()
@@ -0,0 +1,184 @@
+from sqlalchemy import event
+from pymongo import monitoring
+from contextvars import ContextVar
+from contextlib import contextmanager
+import threading
+import json
+import re
+import time
+import os
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# N+1 detection: "log" warns, "raise" fails the request (for tests), "off" skips the fingerprinting
+N_PLUS_ONE_MODE = os.getenv("N_PLUS_ONE_MODE", "log").strip().lower()
+# the same query shape more than this many times in one request is reported
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+class NPlusOneError(AssertionError):
+    """
+    Raised in "raise" mode when a request repeats the same query shape past the threshold
+    """
+    def __init__(self, label: str, repeated: dict):
+        self.label = label
+        self.repeated = repeated
+        super().__init__(f"N+1 queries in {label}: {json.dumps(repeated)}")
+
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_PARAMETER_LISTS = re.compile(r"\((?:\s*(?:%s|\?|%\(\w+\)s|:\w+)\s*,?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def sql_fingerprint(statement: str):
+    """
+    Statement with literals and IN lists collapsed, so the same query with other values has the same fingerprint
+    """
+    statement = _SQL_LITERALS.sub("?", statement)
+    statement = _SQL_PARAMETER_LISTS.sub("(?)", statement)
+    return "mysql: " + _WHITESPACE.sub(" ", statement).strip()
+
+def _shape(value):
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        return [_shape(item) for item in value]
+    return "?"
+
+def mongo_fingerprint(command_name: str, command: dict):
+    """
+    Command name, collection and the shape of its filter/pipeline with every value dropped
+    """
+    collection = command.get(command_name)
+    shape = {key: _shape(command[key]) for key in ("filter", "query", "pipeline", "q", "updates", "deletes") if key in command}
+    return f"mongodb: {command_name} {collection} {json.dumps(shape, sort_keys=True, default=str)}"
+
+class RequestQueryStats:
+    """
+    MySQL statements and Mongo commands issued while serving one request, with a count per fingerprint
+    """
+    def __init__(self, fingerprints: bool = None):
+        # Motor runs the commands on its executor threads, they share this object with the request
+        self._lock = threading.Lock()
+        self.mysql_count = 0
+        self.mysql_seconds = 0.0
+        self.mongo_count = 0
+        self.mongo_seconds = 0.0
+        self.track_fingerprints = N_PLUS_ONE_MODE != "off" if fingerprints is None else fingerprints
+        self.fingerprints = {}
+
+    def _count(self, fingerprint: str):
+        self.fingerprints[fingerprint] = self.fingerprints.get(fingerprint, 0) + 1
+
+    def record_mysql(self, seconds: float, statement: str):
+        fingerprint = sql_fingerprint(statement) if self.track_fingerprints else None
+        with self._lock:
+            self.mysql_count += 1
+            self.mysql_seconds += seconds
+            if fingerprint:
+                self._count(fingerprint)
+
+    def record_mongo(self, seconds: float, command_name: str):
+        with self._lock:
+            self.mongo_count += 1
+            self.mongo_seconds += seconds
+
+    def record_mongo_shape(self, command_name: str, command: dict):
+        # getMore is a cursor being drained, not a query of its own
+        if not self.track_fingerprints or command_name in ("getMore", "killCursors", "endSessions"):
+            return
+        fingerprint = mongo_fingerprint(command_name, command)
+        with self._lock:
+            self._count(fingerprint)
+
+    def repeated(self, threshold: int = None):
+        """
+        Fingerprints issued more than threshold times
+        """
+        threshold = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        with self._lock:
+            return {fingerprint: count for fingerprint, count in self.fingerprints.items() if count > threshold}
+
+def check_n_plus_one(stats: RequestQueryStats, label: str, mode: str = None, threshold: int = None):
+    """
+    Report the repeated query shapes of a request: a structured warning, or NPlusOneError in "raise" mode
+    """
+    mode = N_PLUS_ONE_MODE if mode is None else mode
+    if mode == "off":
+        return {}
+    repeated = stats.repeated(threshold)
+    if repeated:
+        if mode == "raise":
+            raise NPlusOneError(label, repeated)
+        logger.warning("N+1 queries detected " + json.dumps({
+            "request": label,
+            "threshold": N_PLUS_ONE_THRESHOLD if threshold is None else threshold,
+            "repeated": repeated,
+            "mysql_count": stats.mysql_count,
+            "mongo_count": stats.mongo_count
+        }))
+    return repeated
+
+# stats of the request being served, None outside a request (startup, background tasks)
+current_query_stats: ContextVar = ContextVar("current_query_stats", default=None)
+
+@contextmanager
+def record_queries(label: str = "block", mode: str = "raise", threshold: int = None):
+    """
+    Record the queries of a block of code outside a request, e.g. a test calling a handler directly:
+
+        with record_queries("stocks()"):
+            await stocks(...)
+    """
+    stats = RequestQueryStats(fingerprints=True)
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+    check_n_plus_one(stats, label, mode, threshold)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record_mysql(time.perf_counter() - started, statement)
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+def instrument_engine(engine):
+    """
+    Count and time the statements of a SQLAlchemy engine (the sync_engine of an async one)
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Counts and times the commands of the Motor client against the current request.
+    Motor copies the context to its executor threads, so the request stats are visible here.
+    """
+    def started(self, event):
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record_mongo_shape(event.command_name, event.command)
+
+    def succeeded(self, event):
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record_mongo(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record_mongo(event.duration_micros / 1e6, event.command_name)
+
+mongo_command_listener = MongoCommandListener()
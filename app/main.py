@@ -3,27 +3,30 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.routers import store, customers, medicineavailable, orders, substitutes, distributors, manufacturers, purchase, sales, stock, customers, medicinemaster, category, users, pricing
-from fastapi.encoders import jsonable_encoder
-from bson import ObjectId
 import logging
+import asyncio
 # from service our bussness model logic
 from app.routers import service_store
+from app.routers import metrics
+from app.routers import exports
+from app.db.mongodb import get_database
+from app.db.indexes import ensure_indexes
+from app.Service.cache_bus import cache_bus
+from app.Service.medicine_search import build_medicine_search_index
+from app.Service.substitute_graph import substitute_graph
+from app.Service.store_geo import store_geo_index
+from app.responses import ORJSONResponse
+from app.middleware import RequestMetricsMiddleware
 
-app = FastAPI()
-
-# Custom JSON encoder for ObjectId
-def json_encoder(obj):
-    if isinstance(obj, ObjectId):
-        return str(obj)
-    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+# orjson backed responses, ObjectId/Decimal/enums are encoded without manual str() calls
+app = FastAPI(default_response_class=ORJSONResponse)
+# per route latency, database round trips and the Server-Timing header
+app.add_middleware(RequestMetricsMiddleware)
 
 # Configure logger
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# Override default JSONEncoder with custom JSONEncoder
-app.json_encoder = json_encoder
-
 app.include_router(store.router, prefix="/api", tags=["Store"])
 app.include_router(users.router, prefix="/api", tags=["Users"])
 app.include_router(substitutes.router, prefix="/storeapi", tags=["Substitutes"]) 
@@ -39,6 +42,8 @@ app.include_router(medicinemaster.router, prefix="/storeapi", tags=["Medicine Ma
 app.include_router(category.router, prefix="/storeapi", tags=["Category"])
 app.include_router(pricing.router, prefix="/storeapi", tags=["Pricing"])
 
+app.include_router(metrics.router, tags=["Metrics"])
+
 @app.get("/health", tags=["Health"])
 def health_check():
     return {"status": "healthy"}
@@ -47,6 +52,35 @@ def health_check():
 @app.on_event("startup")
 async def on_startup():
     logger.info("App is starting...")
+    # indexes for the hot query shapes, creating an existing index is a no-op
+    try:
+        await ensure_indexes(get_database())
+    except Exception as e:
+        logger.error(f"Error ensuring Mongo indexes: {str(e)}")
+    # picks up the cache invalidations published by the other workers
+    try:
+        await cache_bus.start()
+    except Exception as e:
+        logger.error(f"Error starting the cache invalidation bus: {str(e)}")
+    # a failed build leaves the index stale, the first search builds it instead
+    try:
+        await asyncio.to_thread(build_medicine_search_index)
+    except Exception as e:
+        logger.error(f"Error building the medicine search index: {str(e)}")
+    try:
+        await substitute_graph.ensure_fresh()
+    except Exception as e:
+        logger.error(f"Error building the substitute graph: {str(e)}")
+    try:
+        await store_geo_index.ensure_fresh()
+    except Exception as e:
+        logger.error(f"Error building the store geo index: {str(e)}")
+
+# Shutdown Event
+@app.on_event("shutdown")
+async def on_shutdown():
+    await cache_bus.stop()
+
 # Initialize database connection
 @app.get("/")
 def read_root():
@@ -54,6 +88,7 @@ def read_root():
 
 #service 
 app.include_router(service_store.router, prefix="/storeapi/service", tags=["Service"])
+app.include_router(exports.router, prefix="/storeapi", tags=["Exports"])
 
 # Global Exception Handlers
 @app.exception_handler(StarletteHTTPException)
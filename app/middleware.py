@@ -0,0 +1,148 @@
+from starlette.routing import Match
+from app.db.query_metrics import RequestQueryStats, current_query_stats, check_n_plus_one
+from bisect import bisect_left
+import threading
+import time
+import os
+import logging
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+REQUEST_METRICS_ENABLED = os.getenv("REQUEST_METRICS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class RouteMetrics:
+    """
+    Latency histogram and database usage of one (method, route template)
+    """
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds_total = 0.0
+        self.statuses = {}
+        self.mysql_count = 0
+        self.mysql_seconds = 0.0
+        self.mongo_count = 0
+        self.mongo_seconds = 0.0
+
+class RequestMetrics:
+    """
+    Per route request metrics of this worker, rendered in the Prometheus text format
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, method: str, route: str, status_code: int, seconds: float, stats: RequestQueryStats):
+        with self._lock:
+            metrics = self.routes.get((method, route))
+            if metrics is None:
+                metrics = self.routes[(method, route)] = RouteMetrics()
+            metrics.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.count += 1
+            metrics.seconds_total += seconds
+            metrics.statuses[status_code] = metrics.statuses.get(status_code, 0) + 1
+            metrics.mysql_count += stats.mysql_count
+            metrics.mysql_seconds += stats.mysql_seconds
+            metrics.mongo_count += stats.mongo_count
+            metrics.mongo_seconds += stats.mongo_seconds
+
+    def render(self):
+        lines = [
+            "# HELP istore_http_request_duration_seconds Request latency by route",
+            "# TYPE istore_http_request_duration_seconds histogram"
+        ]
+        with self._lock:
+            routes = sorted(self.routes.items())
+            for (method, route), metrics in routes:
+                labels = f'method="{method}",route="{route}"'
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, metrics.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f'istore_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'istore_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+                lines.append(f"istore_http_request_duration_seconds_sum{{{labels}}} {metrics.seconds_total:.6f}")
+                lines.append(f"istore_http_request_duration_seconds_count{{{labels}}} {metrics.count}")
+            lines += ["# HELP istore_http_requests_total Requests by route and status", "# TYPE istore_http_requests_total counter"]
+            for (method, route), metrics in routes:
+                for status_code, count in sorted(metrics.statuses.items()):
+                    lines.append(f'istore_http_requests_total{{method="{method}",route="{route}",status="{status_code}"}} {count}')
+            lines += ["# HELP istore_db_queries_total MySQL statements and Mongo commands issued by route", "# TYPE istore_db_queries_total counter"]
+            for (method, route), metrics in routes:
+                lines.append(f'istore_db_queries_total{{method="{method}",route="{route}",db="mysql"}} {metrics.mysql_count}')
+                lines.append(f'istore_db_queries_total{{method="{method}",route="{route}",db="mongodb"}} {metrics.mongo_count}')
+            lines += ["# HELP istore_db_query_seconds_total Time spent in MySQL and Mongo by route", "# TYPE istore_db_query_seconds_total counter"]
+            for (method, route), metrics in routes:
+                lines.append(f'istore_db_query_seconds_total{{method="{method}",route="{route}",db="mysql"}} {metrics.mysql_seconds:.6f}')
+                lines.append(f'istore_db_query_seconds_total{{method="{method}",route="{route}",db="mongodb"}} {metrics.mongo_seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+request_metrics = RequestMetrics()
+
+def _route_template(app, scope):
+    """
+    Path template of the matched route, so /stores/{mobile} is one series and not one per mobile
+    """
+    # mounted apps and some custom routes have no path, they are skipped
+    path = getattr(scope.get("route"), "path", None)
+    if path is not None:
+        return path
+    for route in getattr(app, "routes", []):
+        path = getattr(route, "path", None)
+        if path is None:
+            continue
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return path
+    return "unmatched"
+
+def _server_timing(total_seconds: float, stats: RequestQueryStats):
+    return (
+        f'app;dur={total_seconds * 1000:.1f}, '
+        f'mysql;dur={stats.mysql_seconds * 1000:.1f};desc="{stats.mysql_count} queries", '
+        f'mongo;dur={stats.mongo_seconds * 1000:.1f};desc="{stats.mongo_count} commands"'
+    )
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware timing every request and counting its database round trips.
+    Adds a Server-Timing header and feeds the per route metrics of GET /metrics.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not REQUEST_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(time.perf_counter() - started, stats).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            route = "unmatched"
+            try:
+                route = _route_template(scope.get("app"), scope)
+                request_metrics.record(scope["method"], route, status_code, time.perf_counter() - started, stats)
+            except Exception as e:
+                logger.error(f"Error recording request metrics: {str(e)}")
+        # after the response, in "raise" mode the test client re-raises it
+        check_n_plus_one(stats, f"{scope['method']} {route}")
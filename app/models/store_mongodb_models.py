@@ -1,6 +1,6 @@
 from bson import ObjectId
 from pydantic import BaseModel, Field, constr
-from typing import List, Text
+from typing import List, Optional, Text
 from datetime import datetime
 from app.models.store_mongodb_eunums import OrderStatus, PaymentMethod, MedicineForms, UnitsInPack, Package
 
@@ -102,6 +102,7 @@ class PurchaseItem(BaseModel):
     package: Package = Field(..., description="Package can be strip, bottle, vial, amp, sachet") # strip/bottle/vial/amp/sachet
     package_count: int = Field(..., description="Package count") # p
     medicine_quantity: int = Field(..., description="Medicine can be a multiple of unit_quantity * package_count") #n*p
+    batch_number: Optional[constr(max_length=255)] = Field(None, description="Batch number printed on the pack, the stock batch key (batch_id when missing)")
     class Config:
         arbitrary_types_allowed = True
 
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, DateTime, Integer, String, Text, Boolean, DECIMAL, ForeignKey, Enum
+from sqlalchemy import Column, DateTime, Integer, String, Text, Boolean, DECIMAL, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.models.Base import Base
 from app.models.store_mysql_eunums import StoreStatus, UserRole, StoreVerification
 
 class StoreDetails(Base):
     __tablename__ = 'store_details'
+    __table_args__ = (
+        Index('uq_store_details_mobile', 'mobile', unique=True),
+        Index('uq_store_details_email', 'email', unique=True),
+        Index('ix_store_details_active_flag_store_name', 'active_flag', 'store_name'),
+    )
     
     """
     SQLAlchemy model for the StoreDetails table.
@@ -34,6 +39,10 @@ class StoreDetails(Base):
   
 class Manufacturer(Base):
     __tablename__ = 'manufacturer'
+    __table_args__ = (
+        Index('uq_manufacturer_manufacturer_name', 'manufacturer_name', unique=True),
+        Index('ix_manufacturer_active_flag_manufacturer_name', 'active_flag', 'manufacturer_name'),
+    )
     
     """
     SQLAlchemy model for the manufacturer table.
@@ -48,6 +57,10 @@ class Manufacturer(Base):
 
 class Category(Base):
     __tablename__ = 'category'
+    __table_args__ = (
+        Index('uq_category_category_name', 'category_name', unique=True),
+        Index('ix_category_active_flag_category_name', 'active_flag', 'category_name'),
+    )
     
     """
     SQLAlchemy model for the category table.
@@ -62,6 +75,10 @@ class Category(Base):
 
 class MedicineMaster(Base):
     __tablename__ = 'medicine_master'
+    __table_args__ = (
+        Index('uq_medicine_master_medicine_name', 'medicine_name', unique=True),
+        Index('ix_medicine_master_active_flag_medicine_name', 'active_flag', 'medicine_name'),
+    )
     
     """
     SQLAlchemy model for the medicine_master table.
@@ -84,6 +101,9 @@ class MedicineMaster(Base):
 
 class Substitutes(Base):
     __tablename__ = 'substitutes' 
+    __table_args__ = (
+        Index('ix_substitutes_medicine_id_substitute_medicine', 'medicine_id', 'substitute_medicine'),
+    )
     
     """
     SQLAlchemy model for the medicine substitute table.
@@ -95,6 +115,10 @@ class Substitutes(Base):
 
 class Distributor(Base):
     __tablename__ = 'distributor'
+    __table_args__ = (
+        Index('uq_distributor_distributor_name', 'distributor_name', unique=True),
+        Index('ix_distributor_active_flag_distributor_name', 'active_flag', 'distributor_name'),
+    )
     
     """
     SQLAlchemy model for the distributor table.
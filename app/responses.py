@@ -0,0 +1,40 @@
+from fastapi.responses import JSONResponse
+from fastapi.encoders import ENCODERS_BY_TYPE
+from pydantic import BaseModel
+from bson import ObjectId
+from decimal import Decimal
+from enum import Enum
+import orjson
+
+def orjson_default(obj):
+    """
+    Types orjson does not know natively: Mongo ObjectIds, Decimal columns (store latitude/longitude),
+    the Mongo enums and pydantic models
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return obj.dict(by_alias=True)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    # datetimes, dicts keyed by ids and dataclasses are handled by orjson itself
+    return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+class ORJSONResponse(JSONResponse):
+    """
+    Default response class of the app, raw Mongo documents can be returned as they are.
+    Handlers returning it directly also skip jsonable_encoder on large list payloads.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+# jsonable_encoder still runs for response_model routes, teach it the same types
+ENCODERS_BY_TYPE[ObjectId] = str
+ENCODERS_BY_TYPE[Decimal] = float
@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from app.db.mysql import get_db
 from app.models.store_mysql_models import Category as CategoryModel
 from app.schemas.CategorySchema import Category as CategorySchema, CategoryCreate
+from app.Service.pagination import PageParams
+from app.schemas.PageSchema import Page, table_model
 import logging
 from typing import List
 from app.crud.category import creating_category_record, get_category_record, update_category_record, get_category_list, activate_category_record
@@ -22,12 +24,14 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/categories/", status_code=status.HTTP_200_OK)
-def list_categories(db: Session = Depends(get_db)):
+@router.get("/categories/", response_model=Page[table_model(CategoryModel)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+def list_categories(params: PageParams = Depends(), db: Session = Depends(get_db)):
     try:
-        categories = get_category_list(db=db)
+        categories = get_category_list(params=params, db=db)
         if categories:
             return categories
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
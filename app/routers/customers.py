@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
 from app.db.mongodb import get_database
 from app.models.store_mongodb_models import Customer
+from app.Service.pagination import PageParams, mongo_page
+from app.schemas.PageSchema import Page, partial_model
 import logging
 from app.crud.customer import create_customer_collection, get_customer_collection, update_customer_collection, delete_customer_collection
 
@@ -20,12 +21,12 @@ async def create_customer(customer: Customer, db=Depends(get_database)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/customers/", response_model=List[Customer], status_code=status.HTTP_200_OK)
-async def list_customers(skip: int = 0, limit: int = 10, db=Depends(get_database)):
+@router.get("/customers/", response_model=Page[partial_model(Customer)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def list_customers(params: PageParams = Depends(), db=Depends(get_database)):
     try:
-        customers = await db.customers.find().skip(skip).limit(limit).to_list(length=limit)
-        if customers:
-            return customers
+        return await mongo_page(db.customers, params, "customer", fields=Customer.model_fields.keys())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
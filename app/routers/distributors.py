@@ -4,6 +4,8 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.db.mysql_session import get_db
 from app.models.store_mysql_models import Distributor as DistributorModel
 from app.schemas.DistributorSchema import Distributor as DistributorSchema, DistributorCreate
+from app.Service.pagination import PageParams
+from app.schemas.PageSchema import Page, table_model
 import logging
 from typing import List
 from app.crud.distributor import creating_distributor_record, get_all_distributors, get_distibutor_record, update_distributor_record, activate_distributor_record
@@ -23,11 +25,13 @@ def create_distributor(distributor: DistributorCreate, db: Session = Depends(get
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/distributors/", status_code=status.HTTP_200_OK)
-def list_distributors(db: Session = Depends(get_db)):
+@router.get("/distributors/", response_model=Page[table_model(DistributorModel)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+def list_distributors(params: PageParams = Depends(), db: Session = Depends(get_db)):
     try:
-        distributors = get_all_distributors(db=db)
+        distributors = get_all_distributors(params=params, db=db)
         return distributors
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -0,0 +1,200 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
+from app.db.mongodb import get_database
+from app.responses import dumps
+from datetime import datetime, timedelta
+from enum import Enum
+import csv
+import io
+import os
+import logging
+
+# configuring the logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+router = APIRouter()
+
+# documents fetched per round trip, the export never holds more than one batch in memory
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+class ExportFormat(str, Enum):
+    def __str__(self):
+        return str(self.value)
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+SALE_COLUMNS = ["sale_id", "store_id", "sale_date", "invoice_id", "customer_id", "medicine_id", "batch_id", "expiry_date", "quantity", "price"]
+PURCHASE_COLUMNS = ["purchase_id", "store_id", "purchase_date", "distributor_id", "invoice_number", "medicine_id", "batch_id", "expiry_date", "quantity", "price", "medicine_quantity"]
+STOCK_COLUMNS = ["stock_id", "store_id", "medicine_id", "medicine_form", "available_stock", "batch_number", "expiry_date", "batch_quantity"]
+
+def _date_range(start_date: str, end_date: str):
+    date_range = {}
+    if start_date:
+        date_range["$gte"] = datetime.strptime(start_date, '%Y-%m-%d')
+    if end_date:
+        # the whole end day is included
+        date_range["$lt"] = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+    return date_range
+
+def _sale_rows(sale):
+    for item in sale.get("sale_items") or []:
+        yield {
+            "sale_id": str(sale["_id"]),
+            "store_id": sale.get("store_id"),
+            "sale_date": sale.get("sale_date"),
+            "invoice_id": sale.get("invoice_id"),
+            "customer_id": str(sale.get("customer_id")),
+            "medicine_id": item.get("medicine_id"),
+            "batch_id": str(item.get("batch_id")),
+            "expiry_date": item.get("expiry_date"),
+            "quantity": item.get("quantity"),
+            "price": item.get("price")
+        }
+
+def _purchase_rows(purchase):
+    for item in purchase.get("purchase_items") or []:
+        yield {
+            "purchase_id": str(purchase["_id"]),
+            "store_id": purchase.get("store_id"),
+            "purchase_date": purchase.get("purchase_date"),
+            "distributor_id": purchase.get("distributor_id"),
+            "invoice_number": purchase.get("invoice_number"),
+            "medicine_id": item.get("medicine_id"),
+            "batch_id": str(item.get("batch_id")),
+            "expiry_date": item.get("expiry_date"),
+            "quantity": item.get("quantity"),
+            "price": item.get("price"),
+            "medicine_quantity": item.get("medicine_quantity")
+        }
+
+def _stock_rows(stock):
+    batch = stock.get("batch_detais") or {}
+    yield {
+        "stock_id": str(stock["_id"]),
+        "store_id": stock.get("store_id"),
+        "medicine_id": stock.get("medicine_id"),
+        "medicine_form": stock.get("medicine_form"),
+        "available_stock": stock.get("available_stock"),
+        "batch_number": batch.get("batch_number"),
+        "expiry_date": batch.get("expiry_date"),
+        "batch_quantity": batch.get("batch_quantity")
+    }
+
+async def _stream_export(documents_cursor, to_rows, columns, export_format: ExportFormat):
+    """
+    Write the rows of every document as NDJSON lines or CSV, one chunk per fetched batch
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    if export_format == ExportFormat.CSV:
+        writer.writeheader()
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    chunk = []
+    pending = 0
+    try:
+        async for document in documents_cursor:
+            for row in to_rows(document):
+                if export_format == ExportFormat.CSV:
+                    writer.writerow({key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()})
+                else:
+                    chunk.append(dumps(row).decode())
+            pending += 1
+            if pending == EXPORT_BATCH_SIZE:
+                yield _flush(buffer, chunk, export_format)
+                pending = 0
+        if pending:
+            yield _flush(buffer, chunk, export_format)
+    except Exception as e:
+        # headers are already sent, re-raising aborts the connection so a truncated export is not taken as complete
+        logger.error(f"Database error while streaming export: {str(e)}")
+        raise
+
+def _flush(buffer, chunk, export_format: ExportFormat):
+    if export_format == ExportFormat.CSV:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+    data = "".join(line + "\n" for line in chunk)
+    chunk.clear()
+    return data
+
+def _export_response(documents_cursor, to_rows, columns, export_format: ExportFormat, name: str):
+    if export_format == ExportFormat.CSV:
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(documents_cursor.batch_size(EXPORT_BATCH_SIZE), to_rows, columns, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+# Sales export, one row per sold item
+@router.get("/exports/sales/", status_code=status.HTTP_200_OK)
+async def export_sales(
+    store_id: int = None,
+    start_date: str = None,
+    end_date: str = None,
+    format: ExportFormat = ExportFormat.NDJSON,
+    mongo_db = Depends(get_database)):
+    try:
+        match = {}
+        if store_id is not None:
+            match["store_id"] = store_id
+        sale_date = _date_range(start_date, end_date)
+        if sale_date:
+            match["sale_date"] = sale_date
+        sales_cursor = mongo_db.sales.find(
+            match, {"store_id": 1, "sale_date": 1, "invoice_id": 1, "customer_id": 1, "sale_items": 1}
+        ).sort([("sale_date", 1), ("_id", 1)])
+        return _export_response(sales_cursor, _sale_rows, SALE_COLUMNS, format, "sales")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date {e}")
+
+# Purchases export, one row per purchased item
+@router.get("/exports/purchases/", status_code=status.HTTP_200_OK)
+async def export_purchases(
+    store_id: int = None,
+    start_date: str = None,
+    end_date: str = None,
+    format: ExportFormat = ExportFormat.NDJSON,
+    mongo_db = Depends(get_database)):
+    try:
+        match = {}
+        if store_id is not None:
+            match["store_id"] = store_id
+        purchase_date = _date_range(start_date, end_date)
+        if purchase_date:
+            match["purchase_date"] = purchase_date
+        purchases_cursor = mongo_db.purchases.find(
+            match, {"store_id": 1, "purchase_date": 1, "distributor_id": 1, "invoice_number": 1, "purchase_items": 1}
+        ).sort([("purchase_date", 1), ("_id", 1)])
+        return _export_response(purchases_cursor, _purchase_rows, PURCHASE_COLUMNS, format, "purchases")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date {e}")
+
+# Stock export, one row per batch, the date range applies to the batch expiry date
+@router.get("/exports/stocks/", status_code=status.HTTP_200_OK)
+async def export_stocks(
+    store_id: int = None,
+    start_date: str = None,
+    end_date: str = None,
+    format: ExportFormat = ExportFormat.NDJSON,
+    mongo_db = Depends(get_database)):
+    try:
+        match = {}
+        if store_id is not None:
+            match["store_id"] = store_id
+        expiry_date = _date_range(start_date, end_date)
+        if expiry_date:
+            match["batch_detais.expiry_date"] = expiry_date
+        stocks_cursor = mongo_db.stocks.find(
+            match, {"store_id": 1, "medicine_id": 1, "medicine_form": 1, "available_stock": 1, "batch_detais": 1}
+        ).sort([("_id", 1)])
+        return _export_response(stocks_cursor, _stock_rows, STOCK_COLUMNS, format, "stocks")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date {e}")
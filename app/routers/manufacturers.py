@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from app.db.mysql import get_db
 from app.models.store_mysql_models import Manufacturer as ManufacturerModel
 from app.schemas.ManufacturerSchema import Manufacturer as ManufacturerSchema, ManufacturerCreate
+from app.Service.pagination import PageParams
+from app.schemas.PageSchema import Page, table_model
 import logging
 from typing import List
 from app.crud.manufacturers import create_manufacturer_record, get_manufacturer_record, update_manufacturer_record, get_manufacturer_list, activate_manufacturer_record
@@ -22,11 +24,13 @@ def create_manufacturer(manufacturer: ManufacturerCreate, db: Session = Depends(
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/manufacturers/", status_code=status.HTTP_200_OK)
-def list_manufacturers(db: Session = Depends(get_db)):
+@router.get("/manufacturers/", response_model=Page[table_model(ManufacturerModel)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+def list_manufacturers(params: PageParams = Depends(), db: Session = Depends(get_db)):
     try:
-        manufacturers = get_manufacturer_list(db=db)
+        manufacturers = get_manufacturer_list(params=params, db=db)
         return manufacturers
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
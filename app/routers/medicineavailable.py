@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
 from app.db.mongodb import get_database
 from app.models.store_mongodb_models import MedicineAvailability
+from app.Service.pagination import PageParams, mongo_page
+from app.schemas.PageSchema import Page, partial_model
 import logging
 from app.crud.medicine_availability import create_medicine_availability_collection, get_medicine_availability_collection, update_medicine_availability_collection, delete_medicine_availability_collection
 
@@ -20,13 +21,12 @@ async def create_medicine_availability(medicine_availability: MedicineAvailabili
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/medicine_availability/", response_model=List[MedicineAvailability], status_code=status.HTTP_200_OK)
-async def get_all_medicine_availability(skip: int = 0, limit: int = 10, db=Depends(get_database)):
+@router.get("/medicine_availability/", response_model=Page[partial_model(MedicineAvailability)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def get_all_medicine_availability(params: PageParams = Depends(), db=Depends(get_database)):
     try:
-        medicine_availability = await db.medicine_availability.find().skip(skip).limit(limit).to_list(length=limit)
-        for item in medicine_availability:
-            item["_id"] = str(item["_id"])
-        return medicine_availability
+        return await mongo_page(db.medicine_availability, params, "medicine_availability", fields=MedicineAvailability.model_fields.keys())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.mysql_session import get_db
 from app.models.store_mysql_models import MedicineMaster as MedicineMasterModel 
 from app.schemas.MedicinemasterSchema import MedicineMaster as MedicineMasterSchema, MedicineMasterCreate
+from app.Service.pagination import PageParams
+from app.schemas.PageSchema import Page, table_model
 import logging
+from app.Service.medicine_search import search_medicines
 from app.crud.medicine_master import create_medicine_master_record, get_medicine_master_record, update_medicine_master_record, get_medicine_list, activate_medicine_record
 
 router = APIRouter()
@@ -22,11 +25,26 @@ def create_medicine_master(medicine_master: MedicineMasterCreate, db: Session =
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/medicine_master/", status_code=status.HTTP_200_OK)
-def get_all_medicine_master(db: Session = Depends(get_db)):
+@router.get("/medicine_master/", response_model=Page[table_model(MedicineMasterModel)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+def get_all_medicine_master(params: PageParams = Depends(), db: Session = Depends(get_db)):
     try:
-        medicine_master = get_medicine_list(db=db)
+        medicine_master = get_medicine_list(params=params, db=db)
         return medicine_master
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
+@router.get("/medicines/search", status_code=status.HTTP_200_OK)
+def search_medicine(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    """
+    Type-ahead over medicine name, generic name and HSN code, tolerant of misspellings
+    """
+    try:
+        return search_medicines(q=q, db=db, limit=limit)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
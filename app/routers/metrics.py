@@ -0,0 +1,33 @@
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+import logging
+from app.db.mysql import engine, async_engine
+from app.db.pool_metrics import sqlalchemy_pool_snapshot, mongo_pool_listener
+from app.db.mongodb import MONGO_MIN_POOL_SIZE, MONGO_MAX_POOL_SIZE
+from app.Service.cache import dimension_caches
+from app.middleware import request_metrics
+
+router = APIRouter()
+
+# Configure logger
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Prometheus scrape endpoint, request latency and database usage per route
+@router.get("/metrics", response_class=PlainTextResponse, status_code=status.HTTP_200_OK)
+def prometheus_metrics():
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/pools", status_code=status.HTTP_200_OK)
+def pool_metrics():
+    mongodb = mongo_pool_listener.snapshot()
+    mongodb.update({"min_pool_size": MONGO_MIN_POOL_SIZE, "max_pool_size": MONGO_MAX_POOL_SIZE})
+    return {
+        "mysql": sqlalchemy_pool_snapshot(engine),
+        "mysql_async": sqlalchemy_pool_snapshot(async_engine.sync_engine) if async_engine is not None else None,
+        "mongodb": mongodb
+    }
+
+@router.get("/metrics/cache", status_code=status.HTTP_200_OK)
+def cache_metrics():
+    return {name: cache.stats() for name, cache in dimension_caches.items()}
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from pydantic import parse_obj_as
 from app.db.mongodb import get_database
 from app.models.store_mongodb_models import Order
+from app.Service.pagination import PageParams, mongo_page
+from app.schemas.PageSchema import Page, partial_model
 import logging
 from app.crud.orders import create_order_collection, get_order_collection, update_order_collection, delete_order_collection
 
@@ -21,11 +21,12 @@ async def create_order(order: Order, db=Depends(get_database)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/orders/", response_model=List[Order])
-async def get_all_orders(skip: int = 0, limit: int = 10, db=Depends(get_database)):
+@router.get("/orders/", response_model=Page[partial_model(Order)], response_model_exclude_unset=True)
+async def get_all_orders(params: PageParams = Depends(), db=Depends(get_database)):
     try:
-        orders = await db.orders.find().skip(skip).limit(limit).to_list(length=limit)
-        return parse_obj_as(List[Order], orders)
+        return await mongo_page(db.orders, params, "order", fields=Order.model_fields.keys())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
 from datetime import datetime
 from app.db.mongodb import get_database
 from app.models.store_mongodb_models import Pricing
+from app.Service.pagination import PageParams, mongo_page
+from app.schemas.PageSchema import Page, partial_model
 import logging
 from bson import ObjectId
 from app.crud.pricing import create_pricing_collection, get_pricing_collection_by_id, update_pricing_collection, delete_pricing_collection
@@ -22,14 +23,12 @@ async def create_pricing(pricing: Pricing, db=Depends(get_database)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/pricing/", response_model=List[Pricing], status_code=status.HTTP_200_OK)
-async def list_pricing(skip: int = 0, limit: int = 10, db=Depends(get_database)):
+@router.get("/pricing/", response_model=Page[partial_model(Pricing)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+async def list_pricing(params: PageParams = Depends(), db=Depends(get_database)):
     try:
-        pricing_cursor = db.pricing.find().skip(skip).limit(limit)
-        pricing_list = await pricing_cursor.to_list(length=limit)
-        for pricing in pricing_list:
-            pricing["_id"] = str(pricing["_id"])
-        return pricing_list
+        return await mongo_page(db.pricing, params, "pricing", fields=Pricing.model_fields.keys())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
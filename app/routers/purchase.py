@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
 from app.db.mongodb import get_database
 from app.models.store_mongodb_models import Purchase
+from app.Service.pagination import PageParams, mongo_page
+from app.schemas.PageSchema import Page, partial_model
 import logging
 from app.crud.purchase import create_purchase_collection, get_purchase_collection_by_id, update_purchase_collection, delete_purchase_collection
 
@@ -20,13 +21,13 @@ async def create_purchase(purchase: Purchase, db=Depends(get_database)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/purchases/", response_model=List[Purchase])
-async def get_all_purchases(skip: int = 0, limit: int = 10, db=Depends(get_database)):
+@router.get("/purchases/", response_model=Page[partial_model(Purchase)], response_model_exclude_unset=True)
+async def get_all_purchases(params: PageParams = Depends(), db=Depends(get_database)):
     try:
-        purchases = await db.purchases.find().skip(skip).limit(limit).to_list(length=limit)
-        for purchase in purchases:
-            purchase["_id"] = str(purchase["_id"])
-        return purchases
+        # purchases_date index covers the (purchase_date, _id) order
+        return await mongo_page(db.purchases, params, "purchase", fields=Purchase.model_fields.keys(), sorts=("purchase_date",))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -25,8 +25,6 @@ async def create_sale_order(sale: Sale, db=Depends(get_database)):
 async def read_sales(db=Depends(get_database)):
     try:
         sales = await db.sales.find().to_list(length=1000)
-        for sale in sales:
-            sale["_id"] = str(sale["_id"])
         return sales
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
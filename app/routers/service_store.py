@@ -1,21 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.schemas.StoreDetailsSchema import StoreDetailsCreate, StoreDetails
-from app.models.store_mysql_models import (StoreDetails as StoreDetailsModel, MedicineMaster as MedicineMasterModel, Manufacturer as ManufacturerModel, Category as CategoryModel)
+from app.models.store_mysql_models import StoreDetails as StoreDetailsModel
 from app.models.store_mongodb_models import SaleItem, Sale, Purchase
-from app.db.mysql import get_db
+from app.models.store_mongodb_eunums import OrderStatus
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.mysql import get_db, get_async_db
 from app.db.mongodb import get_database
 import logging
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
+from fastapi.responses import StreamingResponse
+from app.responses import ORJSONResponse, dumps
 from sqlalchemy.exc import SQLAlchemyError
 from bson import ObjectId
-from app.models.store_mysql_models import Substitutes as SubstituteModel
-from app.models.store_mysql_models import User as UserModel, Distributor
+from app.models.store_mysql_models import User as UserModel
 from app.schemas.UserSchema import UserCreate
-from app.utils import get_password_hash
-from app.Service.store import store_validation
+from app.utils import resolve_password_hash
+from app.Service.store import get_store_gst_numbers
 from app.crud.store import create_store_record
+from app.Service.stock import allocate_sale_items, apply_sale_stock, revert_sale_stock, stock_listing_pipeline, medicine_batches_section, medicine_purchases_section, medicine_sales_section, medicine_substitutes_section
+from app.Service.distributor import get_distributor_names
+from app.Service.medicine_master import get_medicine_details
+from app.Service.pagination import encode_cursor, decode_cursor
+from app.Service.purchase import ingest_purchases, purchase_rows_from_json, purchase_rows_from_csv
+from app.Service.inventory import refresh_inventory
+from app.Service.cache_bus import publish_invalidation
 
 # configuring the logger
 logger = logging.getLogger(__name__)
@@ -29,13 +40,11 @@ def add_store(store: StoreDetailsCreate, db: Session = Depends(get_db)):
     if not store.store_name or not store.license_number or not store.gst_number:
        raise HTTPException(status_code=400, detail="Invalid input")
     try:
-        #cheacking for the license_number, cause the license number can be unique
-        already_present = store_validation(store, db)
-        if already_present != "unique":
-            raise HTTPException(status_code=400, detail="Store already exists")
-        #inserting the store details in db
+        #inserting the store details in db, duplicates are rejected by the unique mobile and email indexes
         db_store = create_store_record(store, db)
         return db_store
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error: {str(e)}")
@@ -86,181 +95,234 @@ async def create_sales(sales: List[SaleItem], mongo_db = Depends(get_database)):
 async def sales_create(sale: Sale, mongo_db=Depends(get_database)):
     try:
         sale_dict = sale.dict(by_alias=True)
-        sales_items = sale_dict["sale_items"]
         store_id = sale_dict["store_id"]
-        
-        for item in sales_items:
-            medicine_id = item["medicine_id"]
-            quantity = item["quantity"]
-
-            if quantity <= 0:
-                raise HTTPException(status_code=400, detail="Invalid quantity")
 
-            # Fetch the medicine stock
-            medicine_stock = await mongo_db["stocks"].find_one(
-                {"store_id":store_id, "medicine_id": medicine_id, "available_stock": {"$gt": 0}},
-                sort=[("batch_detais.expiry_date", 1)]
-            )
-
-            if not medicine_stock:
-                raise HTTPException(status_code=404, detail="Medicine not available")
-            
-            batch_id = medicine_stock["_id"]
-            expiry_date = medicine_stock["batch_detais"]["expiry_date"]
-            available_quantity = medicine_stock["batch_detais"]["batch_quantity"]
-            item["expiry_date"]=str(expiry_date)
-            if available_quantity <= quantity:
-                quantity -= available_quantity
-                await mongo_db["stocks"].update_one(
-                    {"_id": ObjectId(str(batch_id))},
-                    {"$set": {"available_stock": 0, "batch_detais.batch_quantity": 0}}
-                )
-                await mongo_db["medicine_availability"].update_one(
-                    {"store_id": store_id, "medicine_id": medicine_id},
-                    {"$set": {"available_quantity": 0}}
-                )
-            else:
-                await mongo_db["stocks"].update_one(
-                    {"_id": ObjectId(str(batch_id))},
-                    {"$inc": {"available_stock": -quantity, "batch_detais.batch_quantity": -quantity}}
-                )
-                await mongo_db["medicine_availability"].update_one(
-                    {"store_id": store_id, "medicine_id": medicine_id},
-                    {"$inc": {"available_quantity": -quantity}}
-                )
-                quantity = 0
-            
-        result = await mongo_db["sales"].insert_one(sale_dict)
+        # split every line across the batches it needs, earliest expiry first
+        allocated_items, taken_from_batch, sold_by_medicine = await allocate_sale_items(store_id, sale_dict["sale_items"], mongo_db)
+        sale_dict["sale_items"] = allocated_items
+
+        # no multi-document transaction, a standalone mongod has none: the guarded decrements are
+        # undone when a batch was sold concurrently or the sale cannot be saved
+        await apply_sale_stock(store_id, taken_from_batch, sold_by_medicine, mongo_db)
+        try:
+            result = await mongo_db["sales"].insert_one(sale_dict)
+        except Exception:
+            await revert_sale_stock(store_id, taken_from_batch, sold_by_medicine, mongo_db)
+            raise
         sale_dict["_id"] = str(result.inserted_id)
+        await refresh_inventory([(store_id, item["medicine_id"]) for item in allocated_items], mongo_db)
 
         return sale_dict  # Return the created sale object
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
 # List orders
 @router.get("/orders/list/", status_code=status.HTTP_200_OK)
-async def orders_list(mongo_db = Depends(get_database)):
+async def orders_list(
+    store_id: int = None,
+    order_status: OrderStatus = None,
+    cursor: str = None,
+    limit: int = Query(100, ge=1, le=1000),
+    mongo_db = Depends(get_database)):
     try:
-        session = await mongo_db.client.start_session()
-        async with session.start_transaction():
-            result=[]
-            orders_cursor = mongo_db["orders"].find({"order_status": {"$ne": "delivered"}})
-            orders = await orders_cursor.to_list(length=None)
-            for order in orders:
-                customer_id = str(order["customer_id"])
-                order_status = order["order_status"]
-                payment_method = order["payment_method"]
-                items = len(order["order_items"])
-                customers_cursor = mongo_db["customers"].find({"_id": ObjectId(customer_id)})
-                customers = await customers_cursor.to_list(length=None)
-                for customer in customers:
-                    customer_name = customer["name"]
-                    doctor_name = customer["doctor_name"]
-                    order_list = {
-                        "customer_id": customer_id,
-                        "customer_name": customer_name,
-                        "doctor_name": doctor_name,
-                        "order_status": order_status,
-                        "payment_method": payment_method,
-                        "no_of_items": items
-                    }
-                    result.append(order_list)
-        return result if len(result)>0 else {"No orders Found"}
+        # without a status filter every order that is not delivered yet is listed
+        match = {"order_status": order_status.value if order_status else {"$ne": OrderStatus.DELIVERED.value}}
+        if store_id is not None:
+            match["store_id"] = store_id
+        if cursor:
+            match["_id"] = {"$gt": decode_cursor(cursor)["_id"]}
+
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"_id": 1}},
+            {"$limit": limit + 1},
+            {"$lookup": {
+                "from": "customers",
+                "let": {"customer_id": {"$convert": {"input": "$customer_id", "to": "objectId", "onError": None, "onNull": None}}},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$_id", "$$customer_id"]}}},
+                    {"$project": {"_id": 0, "name": 1, "doctor_name": 1}}
+                ],
+                "as": "customer"
+            }},
+            {"$project": {
+                "customer_id": 1,
+                "customer": {"$first": "$customer"},
+                "order_status": 1,
+                "payment_method": 1,
+                "no_of_items": {"$size": {"$ifNull": ["$order_items", []]}}
+            }}
+        ]
+        orders = await mongo_db["orders"].aggregate(pipeline).to_list(length=None)
+
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = encode_cursor({"_id": orders[-1]["_id"]})
+
+        result = [
+            {
+                "customer_id": str(order["customer_id"]),
+                "customer_name": order["customer"]["name"],
+                "doctor_name": order["customer"]["doctor_name"],
+                "order_status": order["order_status"],
+                "payment_method": order["payment_method"],
+                "no_of_items": order["no_of_items"]
+            }
+            for order in orders if order.get("customer")
+        ]
+        return {"items": result, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database Error: {str(e)}")
 
+# orders enriched per customers lookup while streaming the sales history
+SALES_HISTORY_BATCH_SIZE = 200
+
 # Get sales History the status must be Delevered
 @router.get("/sales/history/", status_code=status.HTTP_200_OK)
-async def sales_history(mongo_db = Depends(get_database)):
+async def sales_history(
+    store_id: int = None,
+    start_date: str = None,
+    end_date: str = None,
+    cursor: str = None,
+    limit: int = Query(500, ge=1, le=5000),
+    mongo_db = Depends(get_database)):
     try:
-        session = await mongo_db.client.start_session()
-        async with session.start_transaction():
-            customers_cursor = mongo_db["customers"].find()  # Fetch all customers
-            result = []
-            customers = await customers_cursor.to_list(length=None)
-            for customer in customers:
-                customer_id = customer["_id"]
-                print(f"{customer_id}, {type(customer_id)}")
-                orders_cursor = mongo_db["orders"].find({"customer_id": str(customer_id), "order_status": "delivered"})  # Fetch orders with status "delivered"
-                orders = await orders_cursor.to_list(length=None)
-                for order in orders:
-                    sale_data = {
+        # driven by the (order_status, order_date) index, oldest delivered order first
+        match = {"order_status": OrderStatus.DELIVERED.value}
+        if store_id is not None:
+            match["store_id"] = store_id
+        order_date = {}
+        if start_date:
+            order_date["$gte"] = datetime.strptime(start_date, '%Y-%m-%d')
+        if end_date:
+            order_date["$lt"] = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+        if order_date:
+            match["order_date"] = order_date
+        if cursor:
+            position = decode_cursor(cursor)
+            match = {"$and": [match, {"$or": [
+                {"order_date": {"$gt": position["order_date"]}},
+                {"order_date": position["order_date"], "_id": {"$gt": position["_id"]}}
+            ]}]}
+
+        orders_cursor = mongo_db["orders"].find(
+            match, {"customer_id": 1, "order_status": 1, "order_date": 1}
+        ).sort([("order_date", 1), ("_id", 1)]).limit(limit + 1).batch_size(SALES_HISTORY_BATCH_SIZE)
+        return StreamingResponse(_stream_sales_history(orders_cursor, limit, mongo_db), media_type="application/json")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date {e}")
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"No sales found {e}")
+
+async def _stream_sales_history(orders_cursor, limit: int, mongo_db):
+    """
+    Stream the sales history page as JSON, enriching each batch of orders with one customers lookup
+    """
+    yield '{"items": ['
+    written = 0
+    next_cursor = None
+    batch = []
+
+    async def flush(orders):
+        customer_ids = {ObjectId(str(order["customer_id"])) for order in orders if ObjectId.is_valid(str(order["customer_id"]))}
+        customers = await mongo_db["customers"].find({"_id": {"$in": list(customer_ids)}}, {"name": 1, "doctor_name": 1}).to_list(length=None)
+        customers = {str(customer["_id"]): customer for customer in customers}
+        rows = []
+        for order in orders:
+            customer = customers.get(str(order["customer_id"]))
+            if customer:
+                rows.append(dumps({
                     "customer_name": customer["name"],
                     "doctor_name": customer["doctor_name"],
-                    "status": order["order_status"]
-                    }
-                    result.append(sale_data)
-        return result
+                    "status": order["order_status"],
+                    "order_date": order["order_date"]
+                }).decode())
+        return rows
+
+    try:
+        seen = 0
+        last_order = None
+        async for order in orders_cursor:
+            if seen == limit:
+                # one order past the page, the next page starts after the last one streamed
+                next_cursor = encode_cursor({"order_date": last_order["order_date"], "_id": last_order["_id"]})
+                break
+            seen += 1
+            last_order = order
+            batch.append(order)
+            if len(batch) == SALES_HISTORY_BATCH_SIZE:
+                for row in await flush(batch):
+                    yield ("," if written else "") + row
+                    written += 1
+                batch = []
+        if batch:
+            for row in await flush(batch):
+                yield ("," if written else "") + row
+                written += 1
     except Exception as e:
-        raise HTTPException(status_code=404, detail=f"No sales found {e}")
+        # headers are already sent, re-raising aborts the response so the client never gets a page that looks complete
+        logger.error(f"Database error while streaming sales history: {str(e)}")
+        raise
+    yield '], "next_cursor": ' + dumps(next_cursor).decode() + '}'
 
 # stocks
 # Get all stocks
 @router.get("/stocks/", status_code=status.HTTP_200_OK)
 async def stocks(
+    store_id: int = None,
+    cursor: str = None,
+    limit: int = Query(100, ge=1, le=1000),
     mongo_db = Depends(get_database),
-    mysql_db: Session = Depends(get_db)):
+    mysql_db: AsyncSession = Depends(get_async_db)):
     try:
+        after_id = decode_cursor(cursor)["_id"] if cursor else None
+        pipeline = stock_listing_pipeline(store_id=store_id, after_id=after_id, limit=limit)
+        stocks = await mongo_db["stocks"].aggregate(pipeline).to_list(length=None)
+
+        next_cursor = None
+        if len(stocks) > limit:
+            stocks = stocks[:limit]
+            next_cursor = encode_cursor({"_id": stocks[-1]["_id"]})
+
+        # medicine, category and manufacturer names for the whole page in one query
+        medicines = await get_medicine_details([stock["medicine_id"] for stock in stocks], mysql_db)
+
         result = []
-        medicine_stocks = mongo_db["stocks"].find()  # getting all the data
-        stocks = await medicine_stocks.to_list(length=None)
         for stock in stocks:
-            medicine_id = stock["medicine_id"]
-            medicine_form = stock["medicine_form"]
-            medicines = mysql_db.query(MedicineMasterModel).filter(MedicineMasterModel.medicine_id == medicine_id).first()
-            if medicines:
-                medicine_name = medicines.medicine_name
-                medicine_generic_name = medicines.generic_name
-                medicine_manufacturer_id = medicines.manufacturer_id
-                medicine_category_id = medicines.category_id
-            categories = mysql_db.query(CategoryModel).filter(CategoryModel.category_id == medicine_category_id).first()
-            if categories:
-                category_name = categories.category_name
-            manufacturers = mysql_db.query(ManufacturerModel).filter(ManufacturerModel.manufacturer_id == medicine_manufacturer_id).first()
-            if manufacturers:
-                manufacturer_name = manufacturers.manufacturer_name
-            is_medicine_available = mongo_db["medicine_availability"].find({"medicine_id": medicine_id})
-            is_medicine = await is_medicine_available.to_list(length=None)
-            if is_medicine:
-                for medicine_stock in is_medicine:
-                    is_stock = "In stock" if (medicine_stock["available_quantity"] > 0) else "Not In Stock"
-            medicine_pricing = mongo_db["pricing"].find({"medicine_id": medicine_id})
-            medicine_pricing = await medicine_pricing.to_list(length=None)
-            if medicine_pricing:
-                for medicine_price in medicine_pricing:
-                    medicine_mrp = medicine_price["mrp"]  # Corrected line
-                    medicine_discount = medicine_price["discount"]  # Corrected line
-                    medicine_net_price = medicine_price["net_rate"]  # Corrected line
-            medicine_purchase = mongo_db["purchases"].find({"purchase_items.medicine_id": medicine_id})
-            medicine_purchase = await medicine_purchase.to_list(length=None)
-            for purchase in medicine_purchase:
-                for item in purchase["purchase_items"]:
-                    batch_id = item["batch_id"]
-                    unit_quantity = item["unit_quantity"]
-                    package_count = item["package_count"]
-                    expiry_date = item["expiry_date"]
-
-                    medicine = {
-                        "medicine_id": medicine_id,
-                        "medicine_name": medicine_name,
-                        "medicine_form": medicine_form,
-                        "manufacturer_name": manufacturer_name,
-                        "category": category_name,
-                        "composition": medicine_generic_name,
-                        "expiry_date": expiry_date,
-                        "is_stock": is_stock,
-                        "unit_quantity": unit_quantity,
-                        "package_count": package_count,
-                        "mrp": medicine_mrp,
-                        "discount": medicine_discount,
-                        "net_rate": medicine_net_price,
-                        "batch_id": str(batch_id)
-                    }
-                    result.append(medicine)
-        return result         
+            medicine = medicines.get(stock["medicine_id"], {})
+            inventory = stock["inventory"][0] if stock["inventory"] else {}
+            pricing = stock["pricing"][0] if stock["pricing"] else {}
+            for item in stock["purchase_items"]:
+                result.append({
+                    "medicine_id": stock["medicine_id"],
+                    "medicine_name": medicine.get("medicine_name"),
+                    "medicine_form": stock["medicine_form"],
+                    "manufacturer_name": medicine.get("manufacturer_name"),
+                    "category": medicine.get("category_name"),
+                    "composition": medicine.get("generic_name"),
+                    "expiry_date": item.get("expiry_date"),
+                    "is_stock": "In stock" if inventory.get("total_units", 0) > 0 else "Not In Stock",
+                    "unit_quantity": item.get("unit_quantity"),
+                    "package_count": item.get("package_count"),
+                    "mrp": pricing.get("mrp"),
+                    "discount": pricing.get("discount"),
+                    "net_rate": pricing.get("net_rate"),
+                    "batch_id": item.get("batch_id")
+                })
+        # returned as a response so the large page skips jsonable_encoder
+        return ORJSONResponse({"items": result, "next_cursor": next_cursor})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Server error {e}")       
 
@@ -268,215 +330,35 @@ async def stocks(
 @router.get("/stocks/{medicine_id}/", status_code=status.HTTP_200_OK)
 async def get_stock_by_medicine(
     medicine_id: int, 
-    mongo_db: Session = Depends(get_database),
-    mysql_db: Session = Depends(get_db)
+    mongo_db = Depends(get_database),
+    mysql_db: AsyncSession = Depends(get_async_db)
 ):
     try:
         if not medicine_id:
             raise HTTPException(status_code=400, detail="Invalid medicine ID")
-        
-        # result
-        result=[]
-        
-        #batches
-        batches = []
-        # Fetch batches of the medicine
-        medicine_batches = await mongo_db.stocks.find({"medicine_id": medicine_id}).to_list(length=None)
-        if not medicine_batches:
-            raise HTTPException(status_code=404, detail="No batches found for the given medicine ID")
-
-        for medicine_batch in medicine_batches:
-            store_id = medicine_batch.get("store_id")
-            batch_available_stock = "In Stock" if medicine_batch.get("available_stock", 0) > 0 else "Not In Stock"
-
-            batch_detais = medicine_batch.get("batch_detais")
-
-            # Ensure batch_detais is iterable
-            if isinstance(batch_detais, dict):
-                batch_detais = [batch_detais]
-            elif not isinstance(batch_detais, list):
-                raise HTTPException(status_code=400, detail="Invalid batch_detais format")
-
-            for batch in batch_detais:
-                batch_number = batch.get("batch_number")
-                expiry_date = batch.get("expiry_date")
-
-                # Fetch price details
-                batch_medicine_price = await mongo_db.pricing.find(
-                    {"store_id": store_id, "medicine_id": medicine_id}
-                ).to_list(length=None)
-                if not batch_medicine_price:
-                    continue
-
-                price = batch_medicine_price[0]  # Assuming only one entry per store_id and medicine_id
-                mrp = price.get("mrp", 0)
-                discount = price.get("discount", 0)
-                net_rate = price.get("net_rate", 0)
-
-                # Fetch purchase details
-                medicine_quantities = await mongo_db.purchases.find(
-                    {"store_id": store_id, "purchase_items.medicine_id": medicine_id}
-                ).to_list(length=None)
-                
-                unit_quantity = package_count = 0
-                for purchase in medicine_quantities:
-                    if not isinstance(purchase.get("purchase_items"), list):
-                        continue
-
-                    for item in purchase["purchase_items"]:
-                        if item.get("medicine_id") == medicine_id:
-                            unit_quantity = item.get("unit_quantity", 0)
-                            package_count = item.get("package_count", 0)
-
-                batches.append({
-                    "store_id": store_id,
-                    "is_stock": batch_available_stock,
-                    "batch_number": batch_number,
-                    "expiry_date": expiry_date,
-                    "mrp": mrp,
-                    "discount": discount,
-                    "net_rate": net_rate,
-                    "unit_quantity": unit_quantity,
-                    "package_count": package_count
-                })
-        
-        # Purchases
-        purchases = []
-        # Fetch purchase details
-        medicine_purchases_cursor = mongo_db.purchases.find({"purchase_items.medicine_id": medicine_id})
-        medicine_purchases = await medicine_purchases_cursor.to_list(length=None)
-        for purchaseed_medicine in medicine_purchases:
-            purchase_store_id = purchaseed_medicine["store_id"]
-            purchase_date = str(purchaseed_medicine["purchase_date"])
-            purchase_distributor_id = purchaseed_medicine["distributor_id"]
-            
-            #distributor_name
-            purchase_distributors = mysql_db.query(Distributor).filter(Distributor.distributor_id == purchase_distributor_id).first()
-            if purchase_distributors:
-                purchase_distributor_name = purchase_distributors.distributor_name
-            
-            for purchse_item in purchaseed_medicine["purchase_items"]:
-                if purchse_item["medicine_id"] == medicine_id:
-                    purchase_batch_id = purchse_item["batch_id"]
-                    purchse_medicine_price = purchse_item["price"]
-                    purchase_unit_quantity = purchse_item["quantity"]
-                    purchase_expiry_date = str(purchse_item["expiry_date"])
-            
-                    purchase_batch = await mongo_db.stocks.find_one({"_id": ObjectId(str(purchase_batch_id))})
-                    if purchase_batch:
-                        batch_detais = purchase_batch["batch_detais"]
-                        if isinstance(batch_detais, dict):
-                            batch_detais = [batch_detais]
-                        for batch_detail in batch_detais:
-                            purchase_batch_number = batch_detail["batch_number"]
-                            
-                            purchases.append({
-                                "store_id": purchase_store_id,
-                                "purchase_date": purchase_date,
-                                "distributor_name": purchase_distributor_name,
-                                "batch_number": purchase_batch_number,
-                                "price": purchse_medicine_price,
-                                "quantity": purchase_unit_quantity,
-                                "expiry_date": purchase_expiry_date
-                            })
-                    
-        #sales
-        sales = []
-        # Fetch sales details
-        medicine_sales_cursor = mongo_db.sales.find({"sale_items.medicine_id": medicine_id})
-        saled_medicines = await medicine_sales_cursor.to_list(length=None)
-        for saled_medicine in saled_medicines:
-            sale_store_id = saled_medicine["store_id"]
-            sale_date = str(saled_medicine["sale_date"])
-            sale_invoice_number = saled_medicine["invoice_id"]
-            
-            saled_customer_id = saled_medicine["customer_id"]
-            medicine_saled_customer = await mongo_db.customers.find_one({"_id": ObjectId(str(saled_customer_id))})
-            if medicine_saled_customer:
-                customer_name = medicine_saled_customer["name"]
-                doctor_name = medicine_saled_customer["doctor_name"]
-            
-            for saled_items in saled_medicine["sale_items"]:
-                if saled_items["medicine_id"] == medicine_id:
-                    sale_batch_id = saled_items["batch_id"]
-                    sale_medicine_price = saled_items["price"]
-                    sale_unit_quantity = saled_items["quantity"]
-                    sale_expiry_date = str(saled_items["expiry_date"])
-                    
-                    sale_batch = await mongo_db.stocks.find_one({"_id": ObjectId(str(sale_batch_id))})
-                    if sale_batch:
-                        batch_detais = sale_batch["batch_detais"]
-                        if isinstance(batch_detais, dict):
-                            batch_detais = [batch_detais]
-                        for batch_detail in batch_detais:
-                            sale_batch_number = batch_detail["batch_number"]
-                            
-                            sales.append({
-                                "store_id": sale_store_id,
-                                "sale_date": sale_date,
-                                "invoice_number": sale_invoice_number,
-                                "customer_name": customer_name,
-                                "doctor_name": doctor_name,
-                                "batch_number": sale_batch_number,
-                                "mrp": sale_medicine_price,
-                                "quantity": sale_unit_quantity,
-                                "expiry_date": sale_expiry_date
-                            })
-        
-        # Substitute Medicine
-        substitute_medicine = []
-        # Fetch substitute medicine details
-        medicine_substitutes = mysql_db.query(SubstituteModel).filter(SubstituteModel.medicine_id == medicine_id).all()
-        for substitute in medicine_substitutes:
-            substitute_medicine_name = substitute.substitute_medicine
-    
-            substitute_medicine_medicine_master = mysql_db.query(MedicineMasterModel).filter(MedicineMasterModel.medicine_name == substitute_medicine_name).first()
-            if substitute_medicine_medicine_master:
-                medicines_id = substitute_medicine_medicine_master.medicine_id
-        
-                substitute_manufacturer_id = substitute_medicine_medicine_master.manufacturer_id
-                substitute_manufacturer = mysql_db.query(ManufacturerModel).filter(ManufacturerModel.manufacturer_id == substitute_manufacturer_id).first()
-                if substitute_manufacturer:
-                    substitute_manufacturer_name = substitute_manufacturer.manufacturer_name
-        
-            substitute_medicine_purchases = mongo_db.purchases.find({"purchase_items.medicine_id": medicines_id})
-            substitute_medicine_purchases = await substitute_medicine_purchases.to_list(length=None)
-            if substitute_medicine_purchases:
-                for substitute_medicine_purchase in substitute_medicine_purchases:
-                    substitute_medicine_store_id = substitute_medicine_purchase["store_id"]
-                    for item in substitute_medicine_purchase["purchase_items"]:
-                        if item["medicine_id"] == medicines_id:
-                            substitute_medicine_unit = item["unit_quantity"]
-                            substitute_medicine_unit_price = item["price"]
-   
-                substitute_medicine_available = mongo_db.medicine_availability.find({"medicine_id": medicines_id, "store_id": substitute_medicine_store_id})
-                substitute_medicine_available = await substitute_medicine_available.to_list(length=None)
-                if substitute_medicine_available:
-                    is_substitute_medicine_available = "In Stock" if substitute_medicine_available[0]["available_quantity"] > 0 else "Not In Stock"
-            
-                substitute_medicine_price = mongo_db.pricing.find({"medicine_id": medicines_id, "store_id": substitute_medicine_store_id})
-                substitute_medicine_price = await substitute_medicine_price.to_list(length=None)
-                if substitute_medicine_price:
-                    substitute_medicine_prices_mrp = substitute_medicine_price[0]["mrp"]
-                
-                substitute_medicine.append({
-                "substitute_medicine_store_id": substitute_medicine_store_id,
-                "substitute_medicine_name": substitute_medicine_name,
-                "substitute_manufacturer_name": substitute_manufacturer_name,
-                "substitute_medicine_unit": substitute_medicine_unit,
-                "substitute_medicine_unit_price": substitute_medicine_unit_price,
-                "is_substitute_medicine_available": is_substitute_medicine_available,
-                "substitute_medicine_mrp_price": substitute_medicine_prices_mrp
-                })
-            
-        result.append({
+
+        # the four sections are independent, fetch them concurrently
+        batches, purchases, sales, substitute_medicine = await asyncio.gather(
+            medicine_batches_section(medicine_id, mongo_db),
+            medicine_purchases_section(medicine_id, mongo_db),
+            medicine_sales_section(medicine_id, mongo_db),
+            medicine_substitutes_section(medicine_id, mongo_db)
+        )
+
+        # distributor names for every purchase in one query
+        distributor_names = await get_distributor_names([purchase["distributor_id"] for purchase in purchases], mysql_db)
+        for purchase in purchases:
+            purchase["distributor_name"] = distributor_names.get(purchase.pop("distributor_id"))
+
+        return [{
             "batches": batches,
             "purchases": purchases,
             "sales": sales,
             "substitutes": substitute_medicine
-        })
-        return result
+        }]
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Server error: {e}")
 
@@ -485,58 +367,67 @@ async def get_stock_by_medicine(
 @router.get("/purchases/", status_code=status.HTTP_200_OK)
 async def get_purchases_by_date_range(
     mongo_db=Depends(get_database),
-    mysql_db: Session = Depends(get_db),
+    mysql_db: AsyncSession = Depends(get_async_db),
     start_date: str = None,
-    end_date: str = None
+    end_date: str = None,
+    store_id: int = None,
+    cursor: str = None,
+    limit: int = Query(500, ge=1, le=5000)
 ):
     try:
-        # Prepare the result list
-        result = []
+        match = {}
+        if store_id is not None:
+            match["store_id"] = store_id
+        purchase_date = {}
+        if start_date:
+            purchase_date["$gte"] = datetime.strptime(start_date, '%Y-%m-%d')
+        if end_date:
+            # the whole end day is included
+            purchase_date["$lt"] = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+        if purchase_date:
+            match["purchase_date"] = purchase_date
+        if cursor:
+            position = decode_cursor(cursor)
+            match = {"$and": [match, {"$or": [
+                {"purchase_date": {"$gt": position["purchase_date"]}},
+                {"purchase_date": position["purchase_date"], "_id": {"$gt": position["_id"]}}
+            ]}]}
+
+        purchases = await mongo_db.purchases.find(
+            match, {"store_id": 1, "distributor_id": 1, "total_amount": 1, "purchase_date": 1, "item_count": {"$size": "$purchase_items"}}
+        ).sort([("purchase_date", 1), ("_id", 1)]).limit(limit + 1).to_list(length=None)
+
+        next_cursor = None
+        if len(purchases) > limit:
+            purchases = purchases[:limit]
+            next_cursor = encode_cursor({"purchase_date": purchases[-1]["purchase_date"], "_id": purchases[-1]["_id"]})
+
+        # shop and distributor details for the whole page, one IN query each
+        shop_gst_numbers = await get_store_gst_numbers([purchase["store_id"] for purchase in purchases], mysql_db)
+        distributor_names = await get_distributor_names([purchase["distributor_id"] for purchase in purchases], mysql_db)
 
-        if start_date and end_date:
-            # Parse the start and end dates
-            start_date = datetime.strptime(start_date, '%Y-%m-%d')
-            end_date = datetime.strptime(end_date, '%Y-%m-%d')
-            # Fetch purchases from MongoDB within the date range
-            purchases = await mongo_db.purchases.find({
-                "purchase_date": {"$gte": start_date, "$lte": end_date}
-            }).to_list(length=None)
-        else:
-            # Fetch all purchases from MongoDB
-           purchases = await mongo_db.purchases.find().to_list(length=None)
-
-        # Iterate through each purchase
+        result = []
         for purchase in purchases:
             shop_id = purchase['store_id']
             distributor_id = purchase['distributor_id']
-            total_amount = purchase['total_amount']
-            total_items = len(purchase['purchase_items'])
-
-            # Fetch shop details
-            shop = mysql_db.query(StoreDetailsModel).filter(StoreDetailsModel.store_id == shop_id).first()
-            if shop:
-                shop_gst = shop.gst_number
-
-                # Fetch distributor details
-                distributor = mysql_db.query(Distributor).filter(Distributor.distributor_id == distributor_id).first()
-                if distributor:
-                    distributor_name = distributor.distributor_name
-
-                    # Append the formatted data to the result
-                    result.append({
-                        "shop_id": shop_id,
-                        "shop_gst": shop_gst,
-                        "distributor_name": distributor_name,
-                        "total_amount": total_amount,
-                        "total_items": total_items
-                    })
-
-        # Return the result
-        return result
+            if shop_id in shop_gst_numbers and distributor_id in distributor_names:
+                result.append({
+                    "shop_id": shop_id,
+                    "shop_gst": shop_gst_numbers[shop_id],
+                    "distributor_name": distributor_names[distributor_id],
+                    "total_amount": purchase['total_amount'],
+                    "total_items": purchase['item_count']
+                })
+
+        return ORJSONResponse({"items": result, "next_cursor": next_cursor})
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date {e}")
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"No purchases found {e}")
-            
+
 #creating the manual purchase
 @router.post("/purchase/create/", status_code=status.HTTP_201_CREATED)
 async def create_purchase(purchase: Purchase, db=Depends(get_database)):
@@ -556,6 +447,38 @@ async def create_purchase(purchase: Purchase, db=Depends(get_database)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
+# Bulk purchase ingestion, JSON array of invoices
+@router.post("/purchase/bulk/", status_code=status.HTTP_200_OK)
+async def bulk_purchase(invoices: List[dict], updated_by: str = "bulk_import", mongo_db=Depends(get_database)):
+    try:
+        rows = purchase_rows_from_json(invoices)
+        if not rows:
+            raise HTTPException(status_code=400, detail="No purchase items to load")
+        # rows are validated one by one, the report says which ones were loaded
+        return await ingest_purchases(rows, mongo_db, updated_by)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
+# Bulk purchase ingestion, CSV upload with one line per purchase item
+@router.post("/purchase/bulk/csv/", status_code=status.HTTP_200_OK)
+async def bulk_purchase_csv(file: UploadFile = File(...), updated_by: str = "bulk_import", mongo_db=Depends(get_database)):
+    try:
+        try:
+            rows = purchase_rows_from_csv(await file.read())
+        except (UnicodeDecodeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV file {e}")
+        if not rows:
+            raise HTTPException(status_code=400, detail="No purchase items to load")
+        return await ingest_purchases(rows, mongo_db, updated_by)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
 # Users
 @router.put("/users/{user_id}", status_code=status.HTTP_200_OK)
 def update_user(user_id: int, user: UserCreate, store: StoreDetailsCreate, db: Session = Depends(get_db)):
@@ -565,7 +488,8 @@ def update_user(user_id: int, user: UserCreate, store: StoreDetailsCreate, db: S
         if not db_user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        hashed_password = get_password_hash(user.password_hash)
+        # profile edits usually send the password back unchanged, keep its hash
+        hashed_password = resolve_password_hash(user.password_hash, db_user.password_hash)
         db_user.username = user.username
         db_user.password_hash = hashed_password
         db_user.role = user.role
@@ -584,6 +508,8 @@ def update_user(user_id: int, user: UserCreate, store: StoreDetailsCreate, db: S
         db.commit()
         db.refresh(db_user)
         db.refresh(db_store)
+        publish_invalidation("user", db_user.user_id)
+        publish_invalidation("store", db_store.store_id, mobile=db_store.mobile)
         return {"message": "User updated successfully", "user": db_user, "store": db_store}
     except SQLAlchemyError as e:
         db.rollback()
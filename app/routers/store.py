@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.db.mysql_session import get_db
+from app.db.mongodb import get_database
 from app.models.store_mysql_models import StoreDetails as StoreDetailsModel
 from app.schemas.StoreDetailsSchema import StoreDetailsCreate, StoreDetails
+from app.Service.pagination import PageParams
+from app.schemas.PageSchema import Page, table_model
 import logging
 from typing import List
+from app.Service.store_geo import get_nearby_stores
 from app.crud.store import create_store_record, get_list_stores, get_store_record, update_store_record, suspend_activate_store, verify_stores
 
 router = APIRouter()
@@ -24,11 +28,34 @@ def add_store(store: StoreDetailsCreate, db: Session = Depends(get_db)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/stores/", status_code=status.HTTP_200_OK)
-def list_stores(db: Session = Depends(get_db)):
+@router.get("/stores/", response_model=Page[table_model(StoreDetailsModel)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+def list_stores(params: PageParams = Depends(), db: Session = Depends(get_db)):
     try:
-        stores = get_list_stores(db)
+        stores = get_list_stores(params, db)
         return stores
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
+# declared before /stores/{mobile} so "nearby" is not taken for a mobile number
+@router.get("/stores/nearby", status_code=status.HTTP_200_OK)
+async def nearby_stores(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    medicine_id: int = None,
+    radius: float = Query(10.0, gt=0, le=100, description="radius in km"),
+    limit: int = Query(10, ge=1, le=50),
+    mongo_db = Depends(get_database)
+):
+    """
+    Nearest active verified stores, only the ones with the medicine in stock when medicine_id is given
+    """
+    try:
+        return await get_nearby_stores(lat=lat, lng=lng, radius_km=radius, limit=limit, mongo_db=mongo_db, medicine_id=medicine_id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
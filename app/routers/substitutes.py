@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.mysql import get_db
+from app.db.mongodb import get_database
 from app.models.store_mysql_models import Substitutes 
 from app.schemas.SubstituteSchema import SubstituteCreate, Substitute
+from app.Service.pagination import PageParams, sql_page
+from app.schemas.PageSchema import Page, partial_model
 import logging
-from typing import List
+from app.Service.substitute_graph import get_available_substitutes
 from app.crud.substitutes import create_substitute_record, get_substitute_record, update_substitute_record, delete_substitute_record
 
 router = APIRouter()
@@ -22,11 +25,12 @@ def create_substitute(substitute: SubstituteCreate, db: Session = Depends(get_db
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/substitutes/", response_model=List[Substitute], status_code=status.HTTP_200_OK)
-def list_substitutes(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+@router.get("/substitutes/", response_model=Page[partial_model(Substitute)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+def list_substitutes(params: PageParams = Depends(), db: Session = Depends(get_db)):
     try:
-        substitutes = db.query(Substitutes).offset(skip).limit(limit).all()
-        return substitutes
+        return sql_page(db, Substitutes, params, "substitute", sorts=("medicine_id",), fields=Substitute.model_fields.keys())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -40,6 +44,19 @@ def get_substitute(substitute_id: int, db: Session = Depends(get_db)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
+@router.get("/substitutes/{medicine_id}/available", status_code=status.HTTP_200_OK)
+async def get_available_substitute_medicines(medicine_id: int, store_id: int, mongo_db = Depends(get_database)):
+    """
+    In-stock substitutes of a medicine at a store, cheapest first
+    """
+    try:
+        return await get_available_substitutes(medicine_id=medicine_id, store_id=store_id, mongo_db=mongo_db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
 @router.put("/substitutes/{substitute_id}", response_model=Substitute, status_code=status.HTTP_200_OK)
 def update_substitute(substitute_id: int, substitute: SubstituteCreate, db: Session = Depends(get_db)):
     try:
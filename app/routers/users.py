@@ -3,10 +3,12 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from app.db.mysql_session import get_db
 from app.models.store_mysql_models import User as UserModel, StoreDetails
-from app.schemas.UserSchema import User as UserSchema, UserCreate
+from app.schemas.UserSchema import User as UserSchema, UserCreate, UserLogin, UserSession, UserPublic
+from app.Service.store import get_store_profile_by_id
+from app.Service.pagination import PageParams, sql_page
+from app.schemas.PageSchema import Page, partial_model
 import logging
-from app.crud.user import create_user_record, get_user_record, update_user_record, delete_user_record
-from typing import List
+from app.crud.user import create_user_record, get_user_record, update_user_record, delete_user_record, authenticate_user_record
 
 router = APIRouter()
 
@@ -24,11 +26,27 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
 
-@router.get("/users/", response_model=List[UserSchema], status_code=status.HTTP_200_OK)
-def list_users(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+@router.post("/users/login/", response_model=UserSession, status_code=status.HTTP_200_OK)
+def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
     try:
-        users = db.query(UserModel).offset(skip).limit(limit).all()
-        return users
+        db_user = authenticate_user_record(credentials.username, credentials.password, db)
+        # the store comes from the store profile cache instead of the lazy user.store relationship
+        session = UserSession.model_validate(db_user)
+        session.store = get_store_profile_by_id(db_user.store_id, db)
+        return session
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
+@router.get("/users/", response_model=Page[partial_model(UserPublic)], response_model_exclude_unset=True, status_code=status.HTTP_200_OK)
+def list_users(params: PageParams = Depends(), db: Session = Depends(get_db)):
+    try:
+        # the fields clients may see, the password hash is never listed
+        return sql_page(db, UserModel, params, "user", sorts=("username",), fields=UserPublic.model_fields.keys())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, create_model
+from typing import Any, Generic, List, Optional, TypeVar
+from decimal import Decimal
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+
+    """
+    One keyset page of a list endpoint, total is only sent when include_total is set.
+    """
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+def partial_model(model, exclude=()):
+    """
+    Item model of a list with every field of the schema optional, fields= may select only some of them
+    """
+    return create_model(
+        f"{model.__name__}Fields",
+        **{name: (Optional[field.annotation], None) for name, field in model.model_fields.items() if name not in exclude}
+    )
+
+def _column_type(column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return Any
+    # numeric columns were sent as numbers before the page models, not as decimal strings
+    return float if python_type is Decimal else python_type
+
+def table_model(model, exclude=()):
+    """
+    Item model of a list returning the table columns, every column optional for fields=
+    """
+    return create_model(
+        f"{model.__name__}Row",
+        **{column.key: (Optional[_column_type(column)], None) for column in model.__table__.columns if column.key not in exclude}
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, constr
-from typing import Optional
+from typing import Optional, Any
 from enum import Enum
 
 class UserRole(str, Enum):
@@ -28,6 +28,14 @@ class UserCreate(UserBase):
     """
     pass
 
+class UserLogin(BaseModel):
+    
+    """
+    Pydantic model for the user login credentials.
+    """
+    username: constr(max_length=255)
+    password: constr(max_length=255)
+
 class User(UserBase):
     
     """
@@ -36,4 +44,24 @@ class User(UserBase):
     user_id: Optional[int]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class UserPublic(BaseModel):
+    
+    """
+    Pydantic model for the user information sent to clients, without the password hash.
+    """
+    user_id: Optional[int]
+    username: constr(max_length=255)
+    role: UserRole
+    store_id: Optional[int]
+
+    class Config:
+        from_attributes = True
+
+class UserSession(UserPublic):
+    
+    """
+    Pydantic model for the logged in user with the profile of their store.
+    """
+    store: Optional[dict[str, Any]] = None
@@ -2,19 +2,69 @@ from fastapi import Depends, HTTPException, status
 from app.db.mongodb import get_database
 from app.db.mysql import get_db
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 import logging
 from passlib.context import CryptContext
 from bson import ObjectId
+import threading
+import os
 
 # Configure logger
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# bcrypt work factor, hashes below it are upgraded on the next successful verify
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, this bounds how many cores hashing can take at once
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS)
+# shared by every hash and verify, the sync handlers call them from the server threadpool
+bcrypt_slots = threading.BoundedSemaphore(BCRYPT_WORKERS)
+
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    with bcrypt_slots:
+        return pwd_context.hash(password)
+
+def verify_password(password, hashed_password):
+    with bcrypt_slots:
+        return pwd_context.verify(password, hashed_password)
+
+def verify_and_update_password(password, hashed_password):
+    """
+    (valid, new_hash), new_hash is set when the stored hash is valid but below the current work factor
+    """
+    with bcrypt_slots:
+        return pwd_context.verify_and_update(password, hashed_password)
+
+def resolve_password_hash(password, hashed_password):
+    """
+    Hash to store for an update: the current hash when the password is unchanged
+    (sent back as the stored hash or verifying against it, upgraded if legacy), a new hash otherwise
+    """
+    if not hashed_password:
+        return get_password_hash(password)
+    if password == hashed_password:
+        return hashed_password
+    try:
+        valid, new_hash = verify_and_update_password(password, hashed_password)
+    except ValueError:
+        # not a hash passlib knows, always replace it
+        valid, new_hash = False, None
+    if valid:
+        return new_hash or hashed_password
+    return get_password_hash(password)
+
+# MySQL error code of a unique key violation
+MYSQL_DUPLICATE_ENTRY = 1062
+
+def is_duplicate_key(error: IntegrityError):
+    """
+    True for a unique key violation, False for the other integrity errors (foreign key, NOT NULL)
+    """
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] == MYSQL_DUPLICATE_ENTRY
 
 # General validation with id and model for MYSQL  
 def validate_by_id(id: int, model, field, db: Session = Depends(get_db)):
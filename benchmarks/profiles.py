@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class Profile:
+    """
+    Row counts seeded for a benchmark run, "full" is the production sized target
+    """
+    name: str
+    stores: int
+    manufacturers: int
+    categories: int
+    distributors: int
+    medicines: int
+    customers: int
+    stock_batches: int
+    purchases: int
+    sales: int
+    orders: int
+
+PROFILES = {
+    "small": Profile("small", stores=20, manufacturers=100, categories=30, distributors=50, medicines=2_000, customers=2_000,
+                     stock_batches=50_000, purchases=10_000, sales=100_000, orders=20_000),
+    "medium": Profile("medium", stores=100, manufacturers=500, categories=60, distributors=200, medicines=20_000, customers=20_000,
+                      stock_batches=500_000, purchases=100_000, sales=2_000_000, orders=200_000),
+    "full": Profile("full", stores=500, manufacturers=2_000, categories=100, distributors=1_000, medicines=100_000, customers=200_000,
+                    stock_batches=5_000_000, purchases=1_000_000, sales=20_000_000, orders=2_000_000),
+}
@@ -0,0 +1,178 @@
+"""
+Drive the /storeapi and /storeapi/service endpoints against a seeded database and record
+p50/p95/p99 latency, throughput and database round trips per request as JSON.
+
+    python -m benchmarks.run --profile small --requests 200 --concurrency 16 --output results.json
+    python -m benchmarks.run --profile small --compare baseline.json --output results.json
+
+Without --base-url the app is served in process through httpx.ASGITransport, with it a running
+server is used. Queries per request come from the Server-Timing header of RequestMetricsMiddleware.
+"""
+from benchmarks.profiles import PROFILES, Profile
+from datetime import datetime, timedelta
+import httpx
+import argparse
+import asyncio
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+_SERVER_TIMING_COUNT = re.compile(r'(mysql|mongo);dur=[\d.]+;desc="(\d+) \w+"')
+
+def _date_range(rng: random.Random, days: int = 30):
+    start = datetime(2025, 1, 1) - timedelta(days=rng.randint(days, 730))
+    return start.strftime('%Y-%m-%d'), (start + timedelta(days=days)).strftime('%Y-%m-%d')
+
+# name -> request factory (method, path, params) drawing its ids from the seeded ranges
+SCENARIOS = {
+    "stock listing": lambda profile, rng: ("GET", "/storeapi/service/stocks/", {"store_id": rng.randint(1, profile.stores), "limit": 100}),
+    "medicine dossier": lambda profile, rng: ("GET", f"/storeapi/service/stocks/{rng.randint(1, profile.medicines)}/", None),
+    "purchases by date": lambda profile, rng: ("GET", "/storeapi/service/purchases/", dict(zip(("start_date", "end_date"), _date_range(rng)), store_id=rng.randint(1, profile.stores))),
+    "orders list": lambda profile, rng: ("GET", "/storeapi/service/orders/list/", {"store_id": rng.randint(1, profile.stores), "order_status": "delivered"}),
+    "sales history": lambda profile, rng: ("GET", "/storeapi/service/sales/history/", dict(zip(("start_date", "end_date"), _date_range(rng)), store_id=rng.randint(1, profile.stores))),
+    "sales export": lambda profile, rng: ("GET", "/storeapi/exports/sales/", dict(zip(("start_date", "end_date"), _date_range(rng, 7)), store_id=rng.randint(1, profile.stores))),
+    "available substitutes": lambda profile, rng: ("GET", f"/storeapi/substitutes/{rng.randint(1, profile.medicines)}/available", {"store_id": rng.randint(1, profile.stores)}),
+    "nearby stores": lambda profile, rng: ("GET", "/api/stores/nearby", {"lat": round(rng.uniform(8.0, 35.0), 4), "lng": round(rng.uniform(68.0, 97.0), 4), "radius": 100, "medicine_id": rng.randint(1, profile.medicines)}),
+    "medicine search": lambda profile, rng: ("GET", "/storeapi/medicines/search", {"q": rng.choice(["medicine ", "medicne ", "generic "]) + f"{rng.randint(1, profile.medicines):06d}"[:rng.randint(2, 6)]}),
+    "medicine list": lambda profile, rng: ("GET", "/storeapi/medicine_master/", None),
+    "distributor list": lambda profile, rng: ("GET", "/storeapi/distributors/", None),
+    "store lookup": lambda profile, rng: ("GET", f"/api/stores/9{rng.randint(1, profile.stores):09d}", None),
+}
+
+def percentile(sorted_values, fraction: float):
+    """
+    Nearest rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return None
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+async def run_scenario(client: httpx.AsyncClient, name: str, profile: Profile, requests: int, concurrency: int, seed: int, warmup: int):
+    make_request = SCENARIOS[name]
+    rng = random.Random(f"{seed}:{name}")
+    planned = [make_request(profile, rng) for _ in range(warmup + requests)]
+    latencies, mysql_counts, mongo_counts = [], [], []
+    errors = 0
+    position = 0
+
+    async def worker():
+        nonlocal position, errors
+        while position < len(planned):
+            index = position
+            position += 1
+            method, path, params = planned[index]
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, params=params)
+                elapsed = time.perf_counter() - started
+                failed = response.status_code >= 400
+                counts = dict((db, int(count)) for db, count in _SERVER_TIMING_COUNT.findall(response.headers.get("server-timing", "")))
+            except httpx.HTTPError:
+                elapsed, failed, counts = time.perf_counter() - started, True, {}
+            if index < warmup:
+                continue
+            latencies.append(elapsed)
+            errors += failed
+            if counts:
+                mysql_counts.append(counts.get("mysql", 0))
+                mongo_counts.append(counts.get("mongo", 0))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_seconds = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / wall_seconds, 2),
+        "mysql_queries_per_request": round(sum(mysql_counts) / len(mysql_counts), 2) if mysql_counts else None,
+        "mongo_commands_per_request": round(sum(mongo_counts) / len(mongo_counts), 2) if mongo_counts else None
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: dict, current: dict):
+    """
+    Relative change of every latency/throughput figure against a previous result file
+    """
+    lines = []
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "mysql_queries_per_request", "mongo_commands_per_request"):
+            before, after = previous.get(key), result.get(key)
+            if before and after is not None:
+                changes.append(f"{key} {before} -> {after} ({(after - before) / before * 100:+.1f}%)")
+        lines.append(f"{name}: " + ", ".join(changes))
+    return lines
+
+async def _main(args):
+    profile = PROFILES[args.profile]
+    scenarios = args.scenario or list(SCENARIOS)
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from app.main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://benchmark"
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        for name in scenarios:
+            results[name] = await run_scenario(client, name, profile, args.requests, args.concurrency, args.seed, args.warmup)
+            logger.info(f"{name}: {json.dumps(results[name])}")
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "profile": profile.name,
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "target": args.base_url or "in-process",
+            "started_at": datetime.utcnow().isoformat()
+        },
+        "scenarios": results
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency, throughput and queries per request of the hot endpoints")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small", help="profile the database was seeded with")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--compare", help="previous JSON result to diff against")
+    args = parser.parse_args()
+
+    result = asyncio.run(_main(args))
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as file:
+            print("\n".join(compare(json.load(file), result)))
+    sys.exit(0)